@@ -0,0 +1,99 @@
+import os
+import sys
+import math
+import time
+import resource
+import multiprocessing
+
+from PIL import Image, ImageOps, ImageChops, ImageStat
+
+import compress_photos
+
+# 設定
+SAMPLE_FOLDER = compress_photos.SOURCE_MEDIA_FOLDER
+SAMPLE_LIMIT = 30          # 最多取幾張原圖來測
+
+def load_resized_full_decode(source_path, box=compress_photos.MAX_SIZE):
+    """ 舊版流程: 完整解碼原圖 -> 轉 RGB -> 套用 EXIF 旋轉 -> 縮圖 """
+    with Image.open(source_path) as img:
+        img = img.convert('RGB')
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail(box)
+        return img
+
+PATHS = {
+    'full': load_resized_full_decode,
+    'draft': compress_photos.load_resized,
+}
+
+def run_path(name, paths, queue):
+    """ 在獨立程序中執行，才能分別量到各自的記憶體峰值 """
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    for path in paths:
+        PATHS[name](path)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, baseline, peak))
+
+def measure(name, paths):
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=run_path, args=(name, paths, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def psnr(a, b):
+    """ 兩張同尺寸圖片的 PSNR (dB)，尺寸不同時先把 b 縮放到 a 的尺寸 """
+    if a.size != b.size:
+        b = b.resize(a.size, Image.LANCZOS)
+    stat = ImageStat.Stat(ImageChops.difference(a, b))
+    mse = sum(x * x for x in stat.rms) / len(stat.rms)
+    if mse == 0:
+        return float('inf')
+    return 10 * math.log10(255 * 255 / mse)
+
+def main():
+    """
+    比較照片壓縮的兩種解碼方式: 完整解碼 vs. JPEG DCT 縮放解碼
+    執行: python benchmark_compress.py [原圖資料夾]
+    (ru_maxrss 在 Linux 為 KB、macOS 為 bytes，以下以 Linux 為準)
+    """
+    folder = sys.argv[1] if len(sys.argv) > 1 else SAMPLE_FOLDER
+    if not os.path.exists(folder):
+        print(f"錯誤: 找不到 {folder}")
+        return
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(('.jpg', '.jpeg')))[:SAMPLE_LIMIT]
+    paths = [os.path.join(folder, n) for n in names]
+    if not paths:
+        print(f"錯誤: {folder} 中沒有 JPEG 檔")
+        return
+
+    with Image.open(paths[0]) as img:
+        sample_size = img.size
+    print(f"--- {len(paths)} 張原圖 (例如 {names[0]}: {sample_size[0]}x{sample_size[1]}) ---")
+
+    results = {}
+    for name in PATHS:
+        elapsed, baseline, peak = measure(name, paths)
+        results[name] = elapsed
+        print(f"{name:6} 總計 {elapsed:6.2f} s ({elapsed / len(paths) * 1000:6.1f} ms/張)  "
+              f"記憶體峰值 {peak / 1024:6.1f} MB (基準 {baseline / 1024:.1f} MB)")
+    print(f"加速: {results['full'] / results['draft']:.1f}x")
+
+    # 畫質比較: 兩種流程的輸出尺寸與 PSNR
+    scores = []
+    size_diffs = 0
+    for path in paths:
+        a = load_resized_full_decode(path)
+        b = compress_photos.load_resized(path)
+        if a.size != b.size:
+            size_diffs += 1
+        scores.append(psnr(a, b))
+    finite = [s for s in scores if s != float('inf')]
+    worst = min(finite) if finite else float('inf')
+    print(f"輸出尺寸不同: {size_diffs} 張；PSNR 最低 {worst:.1f} dB、平均 {sum(finite) / max(len(finite), 1):.1f} dB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+
+import generate_html
+
+# 設定
+IMG_FOLDER = generate_html.LOCAL_IMG_FOLDER
+VALID_EXTS = ('.jpg', '.jpeg', '.png')
+
+def list_images():
+    return sorted(
+        f for f in os.listdir(IMG_FOLDER)
+        if f.lower().endswith(VALID_EXTS)
+    )
+
+def run_pillow(paths, Image):
+    results = []
+    for path in paths:
+        with Image.open(path) as img:
+            results.append((img.width, img.height))
+    return results
+
+def run_probe(paths):
+    return [tuple(generate_html.probe_image_size(path)) for path in paths]
+
+def main():
+    """
+    比較 Pillow 與檔頭探測讀取圖片尺寸的速度
+    執行: python benchmark_image_size.py [重複次數]
+    (不經過 .image_dimensions.json 快取，量的是冷建置時的成本)
+    """
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    if not os.path.exists(IMG_FOLDER):
+        print(f"錯誤: 找不到 {IMG_FOLDER}")
+        return
+    names = list_images()
+    paths = [os.path.join(IMG_FOLDER, n) for n in names]
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    print(f"--- 共 {len(paths)} 張圖片 ({total_bytes / 1024 / 1024:.1f} MB)，重複 {rounds} 次 ---")
+
+    # Pillow 的匯入本身也是冷建置的成本之一
+    t0 = time.perf_counter()
+    from PIL import Image
+    import_cost = time.perf_counter() - t0
+    print(f"匯入 Pillow: {import_cost * 1000:.1f} ms")
+
+    best_pillow = best_probe = float('inf')
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        pillow_results = run_pillow(paths, Image)
+        best_pillow = min(best_pillow, time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        probe_results = run_probe(paths)
+        best_probe = min(best_probe, time.perf_counter() - t0)
+
+    mismatches = [n for n, a, b in zip(names, pillow_results, probe_results) if a != b]
+
+    print(f"Pillow Image.open : {best_pillow * 1000:8.1f} ms ({best_pillow / len(paths) * 1e6:.1f} µs/張)")
+    print(f"檔頭探測          : {best_probe * 1000:8.1f} ms ({best_probe / len(paths) * 1e6:.1f} µs/張)")
+    print(f"加速: {best_pillow / best_probe:.1f}x")
+    if mismatches:
+        print(f"警告: 有 {len(mismatches)} 張圖片尺寸不一致，例如 {mismatches[:5]}")
+    else:
+        print("兩種方法讀到的尺寸完全一致。")
+
+if __name__ == "__main__":
+    main()
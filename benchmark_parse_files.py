@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import random
+import datetime
+import tempfile
+from collections import defaultdict
+
+import filename_timestamps
+
+# 合成清單的組成: (前綴, 副檔名, 比例)
+NAME_PATTERNS = [
+    ('', '.jpg', 0.80),
+    ('', '.mp4', 0.05),
+    ('Screenshot_', '.jpg', 0.10),
+    ('IMG_', '.jpg', 0.03),
+    ('PXL_', '.jpg', 0.02),
+]
+TRIP_DAYS = 9
+
+def make_file_list(count, seed=1122):
+    """ 合成 files.txt 的內容 (依檔名排序，與 generate_files_txt 的輸出相同) """
+    rng = random.Random(seed)
+    prefixes, exts, weights = zip(*NAME_PATTERNS)
+    start = datetime.date(2025, 11, 22)
+    names = set()
+    while len(names) < count:
+        i = rng.choices(range(len(NAME_PATTERNS)), weights)[0]
+        day = (start + datetime.timedelta(days=rng.randrange(TRIP_DAYS))).strftime('%Y%m%d')
+        t = rng.randrange(86400)
+        suffix = '_Chrome' if prefixes[i] == 'Screenshot_' else ''
+        names.add(f"{prefixes[i]}{day}_{t // 3600:02d}{t // 60 % 60:02d}{t % 60:02d}{suffix}{exts[i]}")
+    return sorted(names)
+
+def parse_files_strptime(filename):
+    """ 舊版寫法: 每個檔名都 strptime 成 datetime，再以 lambda 依 datetime 排序 (不認得前綴) """
+    files_by_date = defaultdict(list)
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for line in lines:
+        fname = line.strip()
+        if len(fname) < 15: continue
+        try:
+            dt = datetime.datetime.strptime(f"{fname[:8]}{fname[9:15]}", "%Y%m%d%H%M%S")
+            date_str = dt.strftime("%Y%m%d")
+            time_str = dt.strftime("%H%M%S")
+            files_by_date[date_str].append({'filename': fname, 'datetime': dt, 'time_str': time_str[:4]})
+        except ValueError:
+            continue
+    for date_key in files_by_date:
+        files_by_date[date_key].sort(key=lambda x: x['datetime'])
+    return dict(sorted(files_by_date.items()))
+
+def parse_files_shared(filename):
+    """ 新版: build_site_* 共用的 filename_timestamps.parse_files (切片/正規表示式 + tuple 排序) """
+    return filename_timestamps.parse_files(filename, with_time=True)
+
+def best_of(func, path, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def main():
+    """
+    比較 build_site_* 的 parse_files: 舊版 (strptime + datetime 排序) vs. filename_timestamps
+    執行: python benchmark_parse_files.py [檔名數量]
+    (量的是由檔名推測時間的成本；目前資料夾有媒體目錄時，也會計入讀取目錄的時間)
+    """
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = make_file_list(count)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'files.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(n + '\n' for n in names)
+
+        print(f"--- 合成 {count} 行的 files.txt ({TRIP_DAYS} 天)，各取 5 輪中最快的一輪 ---")
+        old_cost, old = best_of(parse_files_strptime, path, 5)
+        new_cost, new = best_of(parse_files_shared, path, 5)
+
+    # 舊版能解析的檔案，新版必須分到同一天、順序相同；新版另外收進有前綴的檔案
+    old_names = {f['filename'] for files in old.values() for f in files}
+    new_total = sum(len(files) for files in new.values())
+    for date_str, files in old.items():
+        expected = [(f['filename'], f['time_str']) for f in files]
+        got = [(f['filename'], f['time_str']) for f in new[date_str] if f['filename'] in old_names]
+        assert got == expected, date_str
+
+    print(f"舊版 strptime      : {old_cost * 1000:8.1f} ms ({old_cost / count * 1e6:.2f} µs/行)，解析 {len(old_names)} 個檔案")
+    print(f"filename_timestamps: {new_cost * 1000:8.1f} ms ({new_cost / count * 1e6:.2f} µs/行)，解析 {new_total} 個檔案")
+    print(f"加速: {old_cost / new_cost:.1f}x；新版多收進 {new_total - len(old_names)} 個有前綴的檔案 (Screenshot_、IMG_、PXL_)")
+
+if __name__ == "__main__":
+    main()
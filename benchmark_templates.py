@@ -0,0 +1,100 @@
+import sys
+import time
+import textwrap
+
+import generate_html
+
+# 測試用的區塊 (照片尺寸事先放進快取，只量組字串的成本)
+IMAGE_BLOCK = {'type': 'media', 'filename': '20251122_092133.jpg', 'caption': '出發前量了一次行李', 'is_video': False}
+VIDEO_BLOCK = {'type': 'media', 'filename': '20251122_121432.mp4', 'caption': '', 'is_video': True}
+MISSING_BLOCK = {'type': 'media', 'filename': '20251122_999999.mp4', 'caption': '', 'is_video': True}
+YOUTUBE_MAP = {'20251122_121432.mp4': {'id': '7u3TGtZYKZw', 'shorts': True}}
+JOURNAL_BLOCK = {'type': 'journal', 'title': 'Day 1 行程概要', 'content': '淺草、押上、晴空塔<br>南栗橋(住宿)'}
+
+def render_media_dedent(b, youtube_map):
+    """ 舊版寫法: 每個項目組一段 f-string 再跑 textwrap.dedent """
+    fname = b['filename']
+    caption_text = b['caption']
+    caption_extra = ""
+    media_html = ""
+
+    if b['is_video']:
+        video = youtube_map.get(fname)
+        if video:
+            yt_id = video['id']
+            media_html = (
+                f'<iframe width="100%" height="100%" '
+                f'src="https://www.youtube.com/embed/{yt_id}?rel=0" '
+                f'title="YouTube video player" frameborder="0" '
+                f'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" '
+                f'referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>'
+            )
+            caption_extra = "(YouTube 影片)"
+        else:
+            media_html = f'<div style="padding:40px;background:#eee;text-align:center;color:#666;">影片 {fname} 尚未設定 YouTube ID</div>'
+            caption_extra = "(影片尚未連結)"
+    else:
+        img_attr = ' loading="lazy"'
+        w, h = generate_html.get_image_dimensions(fname)
+        if w and h:
+            img_attr = f' width="{w}" height="{h}" loading="lazy" style="aspect-ratio:{w}/{h};"'
+        media_html = f'<img src="{generate_html.OUTPUT_HTML_IMG_PATH}{fname}"{img_attr}>'
+
+    final_caption = caption_text if caption_text else f"這是 {fname} 的圖說... "
+    if caption_extra:
+        final_caption += f" {caption_extra}"
+
+    return textwrap.dedent(f"""
+    <article class="media-item">
+        <div class="media-content">{media_html}</div>
+        <div class="caption">
+            <div>{final_caption}</div>
+            <div class="filename-ref">{fname}</div>
+        </div>
+    </article>""")
+
+def render_journal_dedent(b):
+    return textwrap.dedent(f"""
+    <div class="journal-block">
+        <h3>{b['title']}</h3>
+        <p>{b['content']}</p>
+    </div>""")
+
+def time_per_item(func, args, rounds):
+    best = float('inf')
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best / rounds * 1e6
+
+def main():
+    """
+    比較每個片段的生成成本: 舊版 (f-string + dedent) vs. 預先編譯的樣板
+    執行: python benchmark_templates.py [每種片段的次數]
+    """
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    cases = [
+        ('media-item (照片)', render_media_dedent, generate_html.render_media_block, (IMAGE_BLOCK, YOUTUBE_MAP)),
+        ('media-item (YouTube)', render_media_dedent, generate_html.render_media_block, (VIDEO_BLOCK, YOUTUBE_MAP)),
+        ('media-item (未連結影片)', render_media_dedent, generate_html.render_media_block, (MISSING_BLOCK, YOUTUBE_MAP)),
+    ]
+
+    print(f"--- 每種片段生成 {rounds} 次，取 5 輪中最快的一輪 ---")
+    for name, old, new, args in cases:
+        # 舊版輸出前面多一個換行，其餘必須完全相同
+        assert old(*args) == '\n' + new(*args), name
+        old_cost = time_per_item(old, args, rounds)
+        new_cost = time_per_item(new, args, rounds)
+        print(f"{name:24} 舊版 {old_cost:6.2f} µs  樣板 {new_cost:6.2f} µs  ({old_cost / new_cost:.1f}x)")
+
+    b = JOURNAL_BLOCK
+    assert render_journal_dedent(b) == '\n' + generate_html.render_journal_block(title=b['title'], content=b['content'])
+    old_cost = time_per_item(render_journal_dedent, (b,), rounds)
+    new_cost = time_per_item(lambda: generate_html.render_journal_block(title=b['title'], content=b['content']), (), rounds)
+    print(f"{'journal-block':24} 舊版 {old_cost:6.2f} µs  樣板 {new_cost:6.2f} µs  ({old_cost / new_cost:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os
+import json
+import threading
+
+# 本次寫入/未變更/移除的輸出檔 (給部署工具用)，generate_html 與 generate_style_css 各寫一段:
+# {"generate_html": {"written": [...], "unchanged": [...], "removed": [...]}, "generate_style_css": {...}}
+BUILD_REPORT_FILE = 'build_report.json'
+
+# run_pipeline 會在不同執行緒中同時執行兩個程式，讀取-修改-寫入必須一次做完
+_lock = threading.Lock()
+
+def save_build_report(section, report):
+    """ 寫入 build_report.json 中 section 的部分，保留其他程式的部分；先寫暫存檔再取代，不會留下寫一半的檔案 """
+    with _lock:
+        reports = {}
+        if os.path.exists(BUILD_REPORT_FILE):
+            try:
+                with open(BUILD_REPORT_FILE, 'r', encoding='utf-8') as f:
+                    reports = json.load(f)
+            except (OSError, ValueError):
+                reports = {}
+        reports[section] = report
+        tmp_path = f"{BUILD_REPORT_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, BUILD_REPORT_FILE)
@@ -1,40 +1,8 @@
-import os
-import datetime
-from collections import defaultdict
+import filename_timestamps
 
 # 設定
 INPUT_FILE = 'files.txt'
 
-def parse_files(filename):
-    """ 讀取並解析檔案，回傳 { '20251122': [files...], ... } """
-    if not os.path.exists(filename):
-        print(f"錯誤: 找不到 {filename}")
-        return {}
-
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            dt = datetime.datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-            files_by_date[date_str].append({
-                'filename': fname,
-                'datetime': dt,
-                'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'
-            })
-        except ValueError:
-            continue
-
-    for date_key in files_by_date:
-        files_by_date[date_key].sort(key=lambda x: x['datetime'])
-    
-    return dict(sorted(files_by_date.items()))
-
 def get_common_css():
     """ 回傳所有頁面共用的 CSS """
     return """
@@ -147,7 +115,7 @@ def create_html_file(filename, content, navbar, title="Travel Journal"):
 
 def main():
     print("正在讀取檔案清單...")
-    data = parse_files(INPUT_FILE)
+    data = filename_timestamps.parse_files(INPUT_FILE)
     if not data: return
     
     all_dates = list(data.keys()) # 取得所有日期列表 ['20251122', '20251123', ...]
@@ -1,43 +1,11 @@
 # Built by Gemini on 2025/12/13
 
-import os
-import datetime
-from collections import defaultdict
+import filename_timestamps
 
 # 設定
 INPUT_FILE = './media/files.txt'
 MEDIA_FOLDER = 'media/'  # 指定媒體資料夾路徑
 
-def parse_files(filename):
-    """ 讀取並解析檔案 """
-    if not os.path.exists(filename):
-        print(f"錯誤: 找不到 {filename}")
-        return {}
-
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            dt = datetime.datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-            files_by_date[date_str].append({
-                'filename': fname,
-                'datetime': dt,
-                'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'
-            })
-        except ValueError:
-            continue
-
-    for date_key in files_by_date:
-        files_by_date[date_key].sort(key=lambda x: x['datetime'])
-    
-    return dict(sorted(files_by_date.items()))
-
 def get_common_css():
     """ 
     回傳美化後的 CSS 
@@ -292,7 +260,7 @@ def create_html_file(filename, content, navbar, title="Travel Journal"):
 
 def main():
     print("正在讀取檔案清單...")
-    data = parse_files(INPUT_FILE)
+    data = filename_timestamps.parse_files(INPUT_FILE)
     if not data: return
     
     all_dates = list(data.keys())
@@ -1,6 +1,4 @@
-import os
-import datetime
-from collections import defaultdict
+import filename_timestamps
 
 # --- 設定 ---
 INPUT_FILE = './media/files.txt'
@@ -214,38 +212,6 @@ def write_css_file():
     with open(CSS_FILE, 'w', encoding='utf-8') as f:
         f.write(get_css_content())
 
-def parse_files(filename):
-    """ 讀取檔案清單並依日期分組 """
-    if not os.path.exists(filename):
-        print(f"錯誤: 找不到 {filename}")
-        return {}
-
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            # 假設格式 YYYYMMDD_HHMMSS
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            dt = datetime.datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-            files_by_date[date_str].append({
-                'filename': fname,
-                'datetime': dt,
-                'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'
-            })
-        except ValueError:
-            continue
-
-    # 排序
-    for date_key in files_by_date:
-        files_by_date[date_key].sort(key=lambda x: x['datetime'])
-    
-    return dict(sorted(files_by_date.items()))
-
 def get_head_content(title):
     """ 回傳 HTML Head (包含 Google Fonts 與 CSS 連結) """
     return f"""
@@ -305,7 +271,7 @@ def main():
     write_css_file()
 
     # 2. 讀取檔案清單
-    data = parse_files(INPUT_FILE)
+    data = filename_timestamps.parse_files(INPUT_FILE)
     if not data: 
         print(f"警告: 沒有讀取到資料，請檢查 {INPUT_FILE}")
         return
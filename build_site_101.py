@@ -1,6 +1,6 @@
 import os
-import datetime
-from collections import defaultdict
+
+import filename_timestamps
 
 # --- 設定 ---
 INPUT_FILE = 'files.txt'                   # 檔案清單
@@ -209,26 +209,6 @@ def write_css_file():
     with open(CSS_FILE, 'w', encoding='utf-8') as f:
         f.write(get_css_content())
 
-def parse_files(filename):
-    if not os.path.exists(filename):
-        return {}
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            dt = datetime.datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-            files_by_date[date_str].append({'filename': fname, 'datetime': dt, 'time_str': time_str[:4], # HHMM
-                                            'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'})
-        except ValueError: continue
-    for date_key in files_by_date:
-        files_by_date[date_key].sort(key=lambda x: x['datetime'])
-    return dict(sorted(files_by_date.items()))
-
 def get_navbar_html(all_dates, current_page_key):
     links = []
     cls = 'class="active"' if current_page_key == 'home' else ''
@@ -270,7 +250,7 @@ def main():
         print(f"警告: 找不到 '{OUTPUT_HTML_IMG_PATH}' 資料夾。")
     
     write_css_file()
-    data = parse_files(INPUT_FILE)
+    data = filename_timestamps.parse_files(INPUT_FILE, with_time=True)
     if not data: return
     all_dates = list(data.keys())
 
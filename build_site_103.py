@@ -2,7 +2,8 @@ import os
 import datetime
 import sys
 import textwrap
-from collections import defaultdict
+
+import filename_timestamps
 
 # 嘗試匯入圖片處理庫 (只用來讀取尺寸，速度很快)
 try:
@@ -299,25 +300,6 @@ def write_css_file():
     with open(CSS_FILE, 'w', encoding='utf-8') as f:
         f.write(get_css_content())
 
-def parse_files(filename):
-    if not os.path.exists(filename): return {}
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            dt = datetime.datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-            files_by_date[date_str].append({'filename': fname, 'datetime': dt, 'time_str': time_str[:4],
-                                            'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'})
-        except ValueError: continue
-    for date_key in files_by_date:
-        files_by_date[date_key].sort(key=lambda x: x['datetime'])
-    return dict(sorted(files_by_date.items()))
-
 def get_navbar_html(all_dates, current_page_key):
     links = []
     cls = ' class="active"' if current_page_key == 'home' else ''
@@ -362,7 +344,7 @@ def build_html(targets):
     print("--- 開始建置網站 ---")
     
     youtube_map = load_youtube_ids(YOUTUBE_ID_FILE)
-    data = parse_files(INPUT_FILE)
+    data = filename_timestamps.parse_files(INPUT_FILE, with_time=True)
     if not data: return
     all_dates = list(data.keys())
 
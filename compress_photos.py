@@ -1,82 +1,551 @@
+import io
 import os
 import sys
-import datetime
+import json
+import shutil
+import hashlib
+import tempfile
+import argparse
+import subprocess
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import media_catalog
+import filename_timestamps
+import exclude_list
+import compressed_names
 
 # 嘗試匯入圖片處理庫 Pillow
 try:
-    from PIL import Image, ImageOps
+    from PIL import Image, ImageOps, features
 except ImportError:
     print("錯誤: 尚未安裝 Pillow 套件。")
     print("請在終端機執行: pip install Pillow")
     sys.exit(1)
 
+# numpy 用來計算圖片的佔位色 (選用)；沒有安裝時不產生佔位色
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 # --- 設定 ---
 INPUT_FILE = 'files.txt'          # 檔案清單
 SOURCE_MEDIA_FOLDER = 'media/'            # 原始大檔照片/影片的位置
 COMPRESSED_FOLDER = 'photos_compressed/'  # 壓縮後照片要存放的位置
+COMPRESS_MANIFEST_FILE = 'compress_manifest.json'  # 每張壓縮圖的尺寸與各寬度版本 (generate_html 會讀取)
+MAX_SIZE = (1200, 1200)                   # 壓縮後的長邊上限
+JPEG_QUALITY = 60
 
-def parse_files(filename):
-    """ 讀取檔案清單，為了取得檔名列表 """
-    if not os.path.exists(filename):
-        print(f"錯誤: 找不到 {filename}")
-        return {}
+# 響應式圖片: 另外輸出較窄的版本到 photos_compressed/{寬度}w/，
+# 讓手機只下載需要的大小 (比主圖寬度小的才會產生)
+RESPONSIVE_WIDTHS = (480, 800)
+
+# 新一代格式: 與每個 JPEG (主圖與各寬度版本) 並存，副檔名不同；
+# 編出來沒有比 JPEG 小就不保留。預設不產生，以 --formats webp,avif 開啟
+FORMAT_OPTIONS = {
+    'webp': {'quality': 60, 'method': 6},
+    'avif': {'quality': 50},
+}
+
+# 影片預覽圖: 以 ffmpeg 從原始影片擷取一個畫面 (generate_html --youtube-facade 使用)
+POSTER_FOLDER = os.path.join(COMPRESSED_FOLDER, 'posters')
+POSTER_SEEK_SECONDS = 1.0                 # 擷取第幾秒的畫面 (影片太短時改從開頭擷取)
+
+# 佔位色: 以主圖縮到這個大小以內的版本計算，generate_html 把它當成圖片載入前的底色
+PLACEHOLDER_SAMPLE_SIZE = (64, 64)
+
+# 影響輸出內容的壓縮參數: 任何一項改變，所有輸出都會從原圖重新產生
+# (--widths / --formats 只是增減輸出的版本，缺的會補上，不必全部重做)
+COMPRESS_PARAMS = {
+    'max_size': list(MAX_SIZE),
+    'jpeg_quality': JPEG_QUALITY,
+    'format_options': FORMAT_OPTIONS,
+    'decoder': 'draft',     # 以 DCT 縮放解碼原圖
+}
+PARAMS_FINGERPRINT = hashlib.sha256(json.dumps(COMPRESS_PARAMS, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+# PNG 原圖的輸出保留 PNG 格式 (早期版本存成了 JPEG 內容)，另用一組指紋，才會重新壓縮
+PNG_PARAMS_FINGERPRINT = hashlib.sha256(
+    json.dumps(dict(COMPRESS_PARAMS, output_format='PNG'), sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+# 平行壓縮時，同時解碼中的像素總和上限 (百萬像素，以 DCT 縮放後的解碼尺寸計算)
+# 每百萬像素解碼成 RGB 約佔 3MB，預設值大約對應 2GB 的記憶體
+DEFAULT_MAX_DECODE_MEGAPIXELS = 600
+
+def parse_files(filename, lines=None):
+    """
+    讀取檔案清單，回傳要處理的檔名 (lines 不為 None 時直接使用，不讀檔)
+    有日期的檔案依拍攝時間排序 (規則與 build_site_* 相同，見 filename_timestamps)；
+    推測不出日期的檔案 (例如 IMG_1234.jpg) 也要壓縮，依清單順序排在最後
+    """
+    if lines is None:
+        if not os.path.exists(filename):
+            print(f"錯誤: 找不到 {filename}")
+            return []
+        with open(filename, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+
+    names = [fname for fname in (line.strip() for line in lines) if fname]
+    groups = filename_timestamps.group_by_date(names, media_catalog.load_capture_times())
+    dated = [fname for entries in groups.values() for _, fname in entries]
+    dated_set = set(dated)
+    return dated + [fname for fname in names if fname not in dated_set]
+
+def fit_size(size, box):
+    """ 等比例縮到 box 之內的尺寸 (與 Image.thumbnail 的算法相同，不會放大) """
+    w, h = size
+    scale = min(box[0] / w, box[1] / h, 1)
+    return max(round(w * scale), 1), max(round(h * scale), 1)
+
+def open_for_resize(source_path, box):
+    """
+    開啟原圖並要求 JPEG 解碼器直接以 DCT 縮放 (1/2、1/4、1/8) 解出不小於目標的尺寸，
+    之後才真正解碼；12MP 的手機照片只需解出約 1/4 的像素
+    (box 是正方形，所以在套用 EXIF 旋轉前後計算目標尺寸都一樣)
+    """
+    img = Image.open(source_path)
+    img.draft('RGB', fit_size(img.size, box))
+    return img
+
+def load_resized(source_path, box=MAX_SIZE):
+    """ 讀取原圖並縮到 box 之內，回傳 RGB 圖片 """
+    with open_for_resize(source_path, box) as img:
+        # 1. 修正手機拍攝的旋轉資訊
+        img = ImageOps.exif_transpose(img)
+        # 2. 轉為 RGB
+        img = img.convert('RGB')
+        # 3. 縮圖 (縮小過的解碼結果再以高品質重新取樣)
+        img.thumbnail(box)
+        return img
+
+def variant_path(filename, width, root=COMPRESSED_FOLDER):
+    return os.path.join(root, f"{width}w", filename)
+
+def alternate_path(path, fmt):
+    return compressed_names.alternate_name(path, fmt)
+
+def params_fingerprint(filename):
+    """ 這張圖的輸出應該對應的壓縮參數指紋 """
+    return PNG_PARAMS_FINGERPRINT if compressed_names.output_format(filename) == 'PNG' else PARAMS_FINGERPRINT
 
-    files_by_date = defaultdict(list)
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-        
-    for line in lines:
-        fname = line.strip()
-        if len(fname) < 15: continue
-        try:
-            date_str = fname[:8]
-            time_str = fname[9:15]
-            # 這裡我們只需要檔名來做壓縮，但維持與主程式一樣的解析邏輯
-            files_by_date[date_str].append({
-                'filename': fname,
-                'type': 'video' if fname.lower().endswith(('.mp4', '.mov')) else 'image'
-            })
-        except ValueError:
+def save_output(img, path):
+    """ 依檔名存成 JPEG 或 PNG (與原圖的副檔名一致) """
+    if compressed_names.output_format(path) == 'PNG':
+        img.save(path, "PNG", optimize=True)
+    else:
+        img.save(path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+
+def build_outputs(img, target_path, filename, widths, formats, previous, root=COMPRESSED_FOLDER):
+    """
+    以壓縮後的主圖產生各寬度版本與 WebP/AVIF，回傳 (manifest 項目, 這次新產生的檔案說明)
+    img 為 None 時 (主圖已存在) 只有在真的缺檔時才讀取主圖
+    previous 為上次的 manifest 項目: 已試過但沒有比 JPEG 小的格式不會每次重編
+    root 為輸出的資料夾 (重新壓縮時是暫存資料夾)，第三個回傳值是這張圖目前所有輸出檔的路徑
+    """
+    created = []
+    if img is None:
+        with Image.open(target_path) as probe:
+            size = probe.size
+    else:
+        size = img.size
+
+    def load_rgb(path):
+        with Image.open(path) as jpeg_img:
+            return jpeg_img.convert('RGB')
+
+    # 1. 各寬度版本 (JPEG)
+    outputs = [(size[0], target_path, img)]   # (寬度, JPEG 路徑, 已在記憶體中的圖片或 None)
+    variants = {}
+    for width in sorted(widths):
+        if width >= size[0]:
             continue
-    return files_by_date
+        height = max(round(size[1] * width / size[0]), 1)
+        path = variant_path(filename, width, root)
+        variant_img = None
+        if not os.path.exists(path):
+            if img is None:
+                img = load_rgb(target_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            variant_img = img.resize((width, height), Image.LANCZOS)
+            save_output(variant_img, path)
+            created.append(f"{width}w")
+        variants[str(width)] = [width, height]
+        outputs.append((width, path, variant_img))
+
+    # 2. 每個 JPEG 另存新格式
+    tried = (previous or {}).get('formats', {})
+    available = {fmt: [] for fmt in formats}
+    paths = [path for _, path, _ in outputs]
+    for width, path, out_img in outputs:
+        for fmt in formats:
+            alt_path = alternate_path(path, fmt)
+            if os.path.exists(alt_path):
+                available[fmt].append(width)
+                paths.append(alt_path)
+                continue
+            # JPEG 沒有重新產生、且上次已試過這個格式 -> 上次就判定不划算，不再重編
+            if out_img is None and fmt in tried and width not in tried[fmt]:
+                continue
+            if out_img is None:
+                out_img = img if path == target_path and img is not None else load_rgb(path)
+            out_img.save(alt_path, fmt.upper(), **FORMAT_OPTIONS[fmt])
+            if os.path.getsize(alt_path) < os.path.getsize(path):
+                available[fmt].append(width)
+                paths.append(alt_path)
+                created.append(f"{width}w.{fmt}")
+            else:
+                os.remove(alt_path)
 
-def compress_image_task(filename):
+    entry = {'size': list(size), 'variants': variants}
+    if formats:
+        entry['formats'] = available
+    return entry, created, paths
+
+def dominant_color(img):
     """
-    讀取原始圖片，壓縮並縮小，存入 photos_compressed 資料夾
-    目標: 長邊 1200px, 品質 60 (約 50-100KB)
+    圖片的主色 (#rrggbb): 每個通道量化成 8 階，找出像素最多的色塊，再取該色塊中像素的平均
+    比整張平均更接近畫面中大面積的顏色 (天空、牆面)，不會混成一片灰
     """
-    source_path = os.path.join(SOURCE_MEDIA_FOLDER, filename)
-    target_path = os.path.join(COMPRESSED_FOLDER, filename)
+    sample = img.resize(fit_size(img.size, PLACEHOLDER_SAMPLE_SIZE), Image.BOX)
+    pixels = np.asarray(sample.convert('RGB'), dtype=np.uint8).reshape(-1, 3)
+    bins = (pixels >> 5).astype(np.int32)
+    keys = (bins[:, 0] << 6) | (bins[:, 1] << 3) | bins[:, 2]
+    dominant = np.bincount(keys, minlength=512).argmax()
+    r, g, b = pixels[keys == dominant].mean(axis=0).round().astype(int)
+    return f"#{r:02x}{g:02x}{b:02x}"
 
-    # 如果原始檔案不存在
+def get_placeholder(img, target_path, main_record, cached):
+    """
+    主圖的佔位色 {'color', 'sha256'}，以主圖內容的雜湊為鍵快取在 manifest 中，主圖沒變就不重算
+    img 為 None 時以 DCT 縮放讀取主圖的縮小版；沒有 numpy 時只沿用仍有效的快取
+    """
+    if cached and cached.get('sha256') == main_record['sha256']:
+        return cached
+    if np is None:
+        return None
+    if img is None:
+        with open_for_resize(target_path, PLACEHOLDER_SAMPLE_SIZE) as jpeg_img:
+            color = dominant_color(jpeg_img)
+    else:
+        color = dominant_color(img)
+    return {'color': color, 'sha256': main_record['sha256']}
+
+def file_record(path, previous=None):
+    """ 檔案的 {'sha256', 'bytes', 'mtime_ns'}；大小與修改時間都和上次相同時沿用上次的雜湊，不重讀內容 """
+    st = os.stat(path)
+    if previous and previous.get('bytes') == st.st_size and previous.get('mtime_ns') == st.st_mtime_ns:
+        return previous
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return {'sha256': digest.hexdigest(), 'bytes': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def source_record(filename, previous=None):
+    """ 原圖的 file_record；找不到原圖時回傳 None """
+    source_path = os.path.join(SOURCE_MEDIA_FOLDER, filename)
     if not os.path.exists(source_path):
-        print(f"  [跳過] 找不到原始檔: {filename}")
+        return None
+    return file_record(source_path, previous)
+
+def output_key(path):
+    """ manifest 中輸出檔的名稱: 相對於 photos_compressed/ 的路徑 """
+    return os.path.relpath(path, COMPRESSED_FOLDER).replace(os.sep, '/')
+
+def is_current(entry, source, filename):
+    """ 上次的輸出是否由同一份原圖內容、同一組壓縮參數產生 """
+    return bool(entry and source and entry.get('params') == params_fingerprint(filename)
+                and entry.get('source', {}).get('sha256') == source['sha256'])
+
+def outputs_intact(entry):
+    """ 上次記錄的輸出檔是否都還在，且內容沒有被改過 """
+    outputs = (entry or {}).get('outputs')
+    if not outputs:
         return False
+    for key, record in outputs.items():
+        path = os.path.join(COMPRESSED_FOLDER, key)
+        if not os.path.exists(path) or file_record(path, record)['sha256'] != record['sha256']:
+            return False
+    return True
+
+def is_untracked(entry, filename):
+    """ 沒有原圖紀錄的既有輸出 (手動放入或更早版本產生的)：沿用，不重新壓縮 """
+    return 'source' not in (entry or {}) and os.path.exists(os.path.join(COMPRESSED_FOLDER, filename))
+
+def remove_stale_outputs(filename, previous, widths, keep):
+    """ 重新壓縮成功後，刪除這次沒有再產生的舊輸出 (例如圖變小後不再需要的寬度版本、不再划算的新格式) """
+    target_path = os.path.join(COMPRESSED_FOLDER, filename)
+    jpeg_paths = [target_path] + [variant_path(filename, w) for w in widths]
+    paths = set(jpeg_paths) | {alternate_path(p, fmt) for p in jpeg_paths for fmt in FORMAT_OPTIONS}
+    paths |= {os.path.join(COMPRESSED_FOLDER, key) for key in (previous or {}).get('outputs', {})}
+    for path in paths - set(keep):
+        if os.path.exists(path):
+            os.remove(path)
 
-    # 如果目標檔案已經存在，且不需要強制覆寫，就跳過 (節省時間)
-    if os.path.exists(target_path):
-        print(f"  [已存在] {filename}") 
-        return True
+def commit_staged_outputs(staging, paths):
+    """ 把暫存資料夾中的輸出移到 photos_compressed/ 的對應位置 (取代舊檔)，回傳移動後的路徑 """
+    final_paths = []
+    for path in paths:
+        final_path = os.path.join(COMPRESSED_FOLDER, os.path.relpath(path, staging))
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(path, final_path)
+        final_paths.append(final_path)
+    return final_paths
+
+def copy_outputs(donor_name, donor, filename, root=COMPRESSED_FOLDER):
+    """ 把同內容原圖 (donor_name) 的輸出複製成這個檔名的版本 (寫到 root 之下)，不必再解碼 """
+    donor_stem = os.path.splitext(donor_name)[0]
+    stem = os.path.splitext(filename)[0]
+    for key in donor['outputs']:
+        # key 為 [寬度資料夾/]原圖路徑 (不含副檔名) + 副檔名，原圖路徑可含子資料夾
+        i = key.rindex(donor_stem)
+        new_key = key[:i] + stem + key[i + len(donor_stem):]
+        new_path = os.path.join(root, new_key)
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        shutil.copyfile(os.path.join(COMPRESSED_FOLDER, key), new_path)
+
+def compress_image_task(filename, widths=RESPONSIVE_WIDTHS, formats=(), previous=None, source=None, donor=None):
+    """
+    讀取原始圖片，壓縮並縮小，存入 photos_compressed 資料夾，並在同一輪產生各寬度版本與新格式
+    目標: 長邊 1200px, 品質 60 (約 50-100KB)
+    previous 為這張圖上次的 manifest 項目，source 為原圖目前的 file_record (找不到原圖為 None)，
+    donor 為 (檔名, manifest 項目): 內容與這張原圖相同的另一張圖，可直接複製它的輸出
+    只有原圖內容或壓縮參數改變、或輸出檔遺失/被改過時才重新壓縮
+    新的輸出先寫進暫存資料夾，全部成功後才取代舊檔；失敗時舊的輸出保留，回傳上次的 manifest 項目
+    回傳: (狀態, 訊息, manifest 項目)，狀態為 'done' / 'exists' / 'reused' / 'missing' / 'failed'
+    (不直接 print，平行壓縮時才能由主程序依順序輸出)
+    """
+    target_path = os.path.join(COMPRESSED_FOLDER, filename)
+    previous = previous or {}
+    staging = None
 
     try:
-        with Image.open(source_path) as img:
-            # 1. 轉為 RGB
-            img = img.convert('RGB')
-            # 2. 修正手機拍攝的旋轉資訊
-            img = ImageOps.exif_transpose(img)
-            # 3. 縮圖
-            img.thumbnail((1200, 1200))
-            # 4. 存檔壓縮
-            img.save(target_path, "JPEG", quality=60, optimize=True)
-            
-            print(f"  [壓縮完成] {filename} -> 尺寸: {img.size}")
-            return True
+        img = None
+        # 如果原始檔案不存在: 有輸出就照舊保留 (無從比對)，沒有就跳過
+        if source is None:
+            if not os.path.exists(target_path):
+                return 'missing', f"  [跳過] 找不到原始檔: {filename}", None
+            status, message = 'exists', f"  [已存在] {filename}"
+            basis = previous
+        # 原圖與參數都和上次相同，輸出也完好 -> 不重新壓縮，只補齊缺少的版本
+        elif (is_current(previous, source, filename) and outputs_intact(previous)) or is_untracked(previous, filename):
+            status, message = 'exists', f"  [已存在] {filename}"
+            basis = previous
+        else:
+            staging = tempfile.mkdtemp(prefix='.staging-', dir=COMPRESSED_FOLDER)
+            # 另一個檔名有相同內容的原圖 -> 複製它的輸出
+            if donor and outputs_intact(donor[1]):
+                copy_outputs(donor[0], donor[1], filename, staging)
+                status, message = 'reused', f"  [沿用] {filename} <- {donor[0]}"
+                basis = donor[1]
+            else:
+                img = load_resized(os.path.join(SOURCE_MEDIA_FOLDER, filename))
+                staged_path = os.path.join(staging, filename)
+                os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+                save_output(img, staged_path)
+                status, message = 'done', f"  [壓縮完成] {filename} -> 尺寸: {img.size}"
+                basis = {}
+
+        root = staging or COMPRESSED_FOLDER
+        entry, created, paths = build_outputs(img, os.path.join(root, filename), filename, widths, formats, basis, root)
+        if staging:
+            paths = commit_staged_outputs(staging, paths)
+            remove_stale_outputs(filename, previous, widths, paths)
+        if created:
+            message += f" (+ {', '.join(created)})"
+        if source is None:
+            # 沒有原圖可比對，沿用上次的紀錄
+            entry.update({key: previous[key] for key in ('source', 'params') if key in previous})
+        else:
+            entry['source'] = source
+            entry['params'] = params_fingerprint(filename)
+        old_outputs = previous.get('outputs', {}) if status == 'exists' else {}
+        entry['outputs'] = {output_key(p): file_record(p, old_outputs.get(output_key(p))) for p in paths}
+
+        placeholder = get_placeholder(img, target_path, entry['outputs'][output_key(target_path)], basis.get('placeholder'))
+        if placeholder:
+            entry['placeholder'] = placeholder
+        return status, message, entry
     except Exception as e:
-        print(f"  [壓縮失敗] {filename}: {e}")
+        return 'failed', f"  [壓縮失敗] {filename}: {e}", previous or None
+    finally:
+        if staging:
+            shutil.rmtree(staging, ignore_errors=True)
+
+def extract_poster(filename):
+    """
+    擷取原始影片的一個畫面，縮到 MAX_SIZE 之內存成 JPEG (ffmpeg 會自動套用影片的旋轉資訊)
+    原始影片沒有比預覽圖新就不重新擷取 (影片檔很大，以修改時間判斷，不計算雜湊)
+    回傳: (狀態, 訊息)
+    """
+    source_path = os.path.join(SOURCE_MEDIA_FOLDER, filename)
+    poster_path = os.path.join(POSTER_FOLDER, os.path.splitext(filename)[0] + '.jpg')
+    if not os.path.exists(source_path):
+        return 'missing', f"  [跳過] 找不到原始檔: {filename}"
+    if os.path.exists(poster_path) and os.path.getmtime(poster_path) >= os.path.getmtime(source_path):
+        return 'exists', f"  [已存在] {filename}"
+
+    for seek in (POSTER_SEEK_SECONDS, 0):
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-ss', str(seek), '-i', source_path,
+             '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-'],
+            capture_output=True)
+        if result.returncode == 0 and result.stdout:
+            break
+    else:
+        return 'failed', f"  [擷取失敗] {filename}: {result.stderr.decode('utf-8', 'replace').strip()}"
+
+    with Image.open(io.BytesIO(result.stdout)) as frame:
+        img = frame.convert('RGB')
+    img.thumbnail(MAX_SIZE)
+    os.makedirs(os.path.dirname(poster_path), exist_ok=True)
+    img.save(poster_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    return 'done', f"  [擷取完成] {filename} -> 尺寸: {img.size}"
+
+def load_compress_manifest():
+    if not os.path.exists(COMPRESS_MANIFEST_FILE):
+        return {}
+    try:
+        with open(COMPRESS_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"提示: 無法讀取 {COMPRESS_MANIFEST_FILE}，將重新建立。")
+        return {}
+
+def save_compress_manifest(manifest):
+    tmp_path = COMPRESS_MANIFEST_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, COMPRESS_MANIFEST_FILE)
+
+def may_decode(filename, previous, source, donor):
+    """ 這張圖這次是否可能需要解碼原圖 (輸出遺失或被改過要到壓縮時才知道，這裡不計) """
+    if source is None or donor or is_current(previous, source, filename):
         return False
+    return not is_untracked(previous, filename)
+
+def estimate_decode_pixels(filename, previous=None, source=None, donor=None):
+    """ 壓縮這張圖片時需要解碼的像素數 (只讀檔頭並套用 DCT 縮放；不需壓縮的回傳 0) """
+    if not may_decode(filename, previous, source, donor):
+        return 0
+    try:
+        with open_for_resize(os.path.join(SOURCE_MEDIA_FOLDER, filename), MAX_SIZE) as img:
+            return img.width * img.height
+    except Exception:
+        return 0
+
+def hash_sources(filenames, manifest, jobs):
+    """ 每張原圖的 file_record (大小與修改時間沒變的直接沿用 manifest 中的雜湊)；jobs != 1 時平行計算 """
+    previous = [manifest.get(fname, {}).get('source') for fname in filenames]
+    if jobs == 1:
+        return [source_record(fname, prev) for fname, prev in zip(filenames, previous)]
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        return list(pool.map(source_record, filenames, previous, chunksize=16))
+
+def find_donors(filenames, sources, manifest):
+    """
+    內容與上次某張圖相同、自己卻沒有最新輸出的檔名 (例如原圖改名) -> (來源檔名, manifest 項目)
+    只採用以目前壓縮參數產生、且這一輪不會被重新壓縮的輸出；
+    副檔名必須相同 (輸出沿用原圖的副檔名，複製過來的檔名與格式才會一致)
+    """
+    current = dict(zip(filenames, sources))
+    by_hash = {}
+    for name, entry in manifest.items():
+        if name in current and not is_current(entry, current[name], name):
+            continue
+        if entry.get('params') == params_fingerprint(name) and entry.get('outputs'):
+            by_hash.setdefault((entry['source']['sha256'], os.path.splitext(name)[1]), (name, entry))
+    donors = []
+    for fname, source in zip(filenames, sources):
+        donor = by_hash.get((source['sha256'], os.path.splitext(fname)[1])) if source else None
+        if donor and (donor[0] == fname or is_current(manifest.get(fname), source, fname)):
+            donor = None
+        donors.append(donor)
+    return donors
+
+def run_compress_tasks(filenames, jobs, max_pixels, widths=RESPONSIVE_WIDTHS, formats=(), manifest=None):
+    """
+    依清單順序回傳每張圖片的 (檔名, 狀態, 訊息, manifest 項目)
+    先算出每張原圖的內容雜湊，再決定哪些要重新壓縮、哪些可沿用其他檔名的輸出
+    jobs > 1 時以多個程序平行壓縮，並限制同時解碼中的像素總和不超過 max_pixels，
+    避免好幾張全景照同時解碼把記憶體用光 (單張超過上限時仍會單獨處理)
+    """
+    manifest = manifest or {}
+    sources = hash_sources(filenames, manifest, jobs)
+    donors = find_donors(filenames, sources, manifest)
+    task_args = [(fname, widths, formats, manifest.get(fname), source, donor)
+                 for fname, source, donor in zip(filenames, sources, donors)]
+    if jobs == 1:
+        for args in task_args:
+            yield (args[0],) + compress_image_task(*args)
+        return
+
+    workers = jobs or os.cpu_count() or 1
+    costs = [estimate_decode_pixels(fname, previous, source, donor)
+             for fname, _, _, previous, source, donor in task_args]
+    finished = {}
+    in_flight = {}          # future -> 清單中的位置
+    in_flight_pixels = 0
+    next_submit = 0
+    next_report = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while next_report < len(filenames):
+            # 在像素預算內盡量送出工作 (每個 worker 一次只排一張，預算才準確)
+            while (next_submit < len(filenames) and len(in_flight) < workers
+                   and (not in_flight or in_flight_pixels + costs[next_submit] <= max_pixels)):
+                future = pool.submit(compress_image_task, *task_args[next_submit])
+                in_flight[future] = next_submit
+                in_flight_pixels += costs[next_submit]
+                next_submit += 1
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = in_flight.pop(future)
+                in_flight_pixels -= costs[idx]
+                finished[idx] = future.result()
+
+            # 依原本的順序輸出已完成的結果
+            while next_report in finished:
+                yield (filenames[next_report],) + finished.pop(next_report)
+                next_report += 1
+
+def parse_widths(text):
+    """ 命令列的寬度清單，例如 "480,800"；空字串代表不產生其他寬度 """
+    return tuple(sorted({int(w) for w in text.split(',') if w.strip()}))
+
+def parse_formats(text):
+    """ 命令列的格式清單，例如 "webp,avif" """
+    formats = []
+    for fmt in (f.strip().lower() for f in text.split(',')):
+        if not fmt:
+            continue
+        if fmt not in FORMAT_OPTIONS:
+            raise argparse.ArgumentTypeError(f"不支援的格式: {fmt} (可用: {', '.join(FORMAT_OPTIONS)})")
+        formats.append(fmt)
+    return tuple(formats)
+
+def main(argv=None, listing=None):
+    """ argv 為命令列參數 (None = sys.argv)；listing 為檔名清單 (None = 讀取 files.txt) """
+    parser = argparse.ArgumentParser(description="壓縮 media/ 中的照片到 photos_compressed/")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="平行壓縮的程序數 (預設 1 = 循序；0 = 依 CPU 核心數)")
+    parser.add_argument('--max-decode-megapixels', type=float, default=DEFAULT_MAX_DECODE_MEGAPIXELS,
+                        help="平行壓縮時，同時解碼中的原圖像素總和上限 (百萬像素)")
+    parser.add_argument('--widths', type=parse_widths, default=RESPONSIVE_WIDTHS,
+                        help="另外產生的圖片寬度，以逗號分隔 (預設 480,800；空字串 = 不產生)")
+    parser.add_argument('--formats', type=parse_formats, default=(),
+                        help="另外輸出的新格式，以逗號分隔，例如 webp,avif (比 JPEG 小才保留)")
+    args = parser.parse_args(argv)
+
+    # Pillow 編譯時沒有對應的編碼器就略過該格式
+    formats = tuple(fmt for fmt in args.formats if features.check(fmt))
+    for fmt in sorted(set(args.formats) - set(formats)):
+        print(f"提示: 目前的 Pillow 不支援 {fmt} 編碼，將略過此格式。")
+
+    if np is None:
+        print("提示: 尚未安裝 numpy，將不產生圖片佔位色 (pip install numpy)。")
 
-def main():
     print("--- 開始執行照片壓縮任務 ---")
     
     # 0. 建立壓縮圖片資料夾
@@ -85,20 +554,58 @@ def main():
         print(f"建立資料夾: {COMPRESSED_FOLDER}")
 
     # 1. 讀取清單
-    data = parse_files(INPUT_FILE)
-    if not data: return
+    names = parse_files(INPUT_FILE, listing)
+    if not names: return
+    images = [fname for fname in names if not fname.lower().endswith(media_catalog.VIDEO_EXTS)]
+    excluded = exclude_list.load_exclude_list()
+    if excluded:
+        kept = [fname for fname in images if fname not in excluded]
+        print(f"依 {exclude_list.EXCLUDE_FILE} 排除 {len(images) - len(kept)} 張圖片")
+        images = kept
+    videos = [fname for fname in names if fname.lower().endswith(media_catalog.VIDEO_EXTS)]
 
     # 2. 批次壓縮圖片
     print("\n正在掃描並壓縮圖片...")
-    count = 0
-    for date_str, files in data.items():
-        for file in files:
-            if file['type'] == 'image':
-                if compress_image_task(file['filename']):
-                    count += 1
+    counts = defaultdict(int)
+    failures = []
+    previous_manifest = load_compress_manifest()
+    manifest = {}
+    max_pixels = int(args.max_decode_megapixels * 1_000_000)
+    tasks = run_compress_tasks(images, args.jobs, max_pixels, args.widths, formats, previous_manifest)
+    for fname, status, message, entry in tasks:
+        print(message)
+        counts[status] += 1
+        if status == 'failed':
+            failures.append(message.strip())
+        if entry:
+            manifest[fname] = entry
+
+    # 3. 記錄每張圖的尺寸、寬度版本、新格式與佔位色 (generate_html 據此輸出 srcset、<picture> 與底色)，
+    #    以及原圖雜湊、壓縮參數與輸出雜湊，下次據此判斷哪些需要重新產生
+    save_compress_manifest(manifest)
     
     print(f"\n任務完成！已檢查所有圖片。")
+    print(f"壓縮 {counts['done']} 張、已存在 {counts['exists']} 張、沿用同內容原圖 {counts['reused']} 張、找不到原始檔 {counts['missing']} 張、失敗 {counts['failed']} 張")
+    if failures:
+        print("\n以下圖片壓縮失敗:")
+        for message in failures:
+            print(f"  {message}")
     print(f"壓縮後的圖片位於: {COMPRESSED_FOLDER}")
 
+    # 4. 擷取影片預覽圖
+    if not videos:
+        return
+    if shutil.which('ffmpeg') is None:
+        print("\n提示: 找不到 ffmpeg，將不擷取影片預覽圖 (generate_html --youtube-facade 會改用 YouTube 的縮圖)。")
+        return
+    print("\n正在擷取影片預覽圖...")
+    poster_counts = defaultdict(int)
+    for fname in videos:
+        status, message = extract_poster(fname)
+        print(message)
+        poster_counts[status] += 1
+    print(f"擷取 {poster_counts['done']} 張、已存在 {poster_counts['exists']} 張、"
+          f"找不到原始檔 {poster_counts['missing']} 張、失敗 {poster_counts['failed']} 張")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
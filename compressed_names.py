@@ -0,0 +1,19 @@
+import os
+
+# compress_photos 的輸出檔名規則 (generate_html 依相同規則組出網址)
+# 主圖與各寬度版本沿用原圖的檔名: PNG (多半是截圖) 保留 PNG 格式，其餘一律存成 JPEG
+
+def output_format(filename):
+    """ 壓縮後的檔案格式 (Pillow 的格式名稱) """
+    return 'PNG' if filename.lower().endswith('.png') else 'JPEG'
+
+def alternate_name(path, fmt):
+    """
+    同一張圖的新格式 (WebP/AVIF) 檔名
+    x.jpg -> x.webp；其他副檔名保留原副檔名，例如 x.png -> x.png.webp，
+    同名的 x.jpg 與 x.png 才不會寫到同一個檔案
+    """
+    stem, ext = os.path.splitext(path)
+    if ext == '.jpg':
+        return f"{stem}.{fmt}"
+    return f"{path}.{fmt}"
@@ -0,0 +1,32 @@
+import os
+
+# 不發布的照片清單 (例如 find_duplicates 找出的連拍)
+# 可手動編輯；find_duplicates 會把新找到的檔名接在最後。compress_photos 不壓縮、generate_date_template 不列入 template
+EXCLUDE_FILE = 'exclude.txt'
+
+def load_exclude_list(filename=EXCLUDE_FILE):
+    """ 一行一個檔名，# 開頭為註解；沒有這個檔案時為空 """
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip() and not line.startswith('#')}
+
+def add_to_exclude_list(names, filename=EXCLUDE_FILE):
+    """ 把清單中還沒有的檔名接在檔案最後 (既有的內容、註解與順序不變)，回傳新增的數量 """
+    existing = load_exclude_list(filename)
+    new_names = []
+    for name in names:
+        if name not in existing:
+            existing.add(name)
+            new_names.append(name)
+    if not new_names:
+        return 0
+    prefix = ''
+    if os.path.exists(filename) and os.path.getsize(filename):
+        with open(filename, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read() != b'\n':
+                prefix = '\n'
+    with open(filename, 'a', encoding='utf-8') as f:
+        f.write(prefix + ''.join(name + '\n' for name in new_names))
+    return len(new_names)
@@ -0,0 +1,94 @@
+import os
+import re
+import datetime
+from collections import defaultdict
+
+# 檔名中的拍攝時間 YYYYMMDD_HHMMSS，前面可以有英文字母的前綴 (可有多段):
+# 20251122_113637.jpg、Screenshot_20251122_170056_Chrome.jpg、IMG_20251122_113637.jpg、
+# PXL_20251122_113637123.jpg、Screen_Recording_20251122_170056.mp4
+PREFIXED_TIMESTAMP_RE = re.compile(r'(?:[A-Za-z]+_)+(\d{8})_(\d{6})')
+
+# 已檢查過的日期 -> 是否合法 (一趟旅行只有幾天，每個日期只需要檢查一次)
+_valid_dates = {}
+
+def is_valid_date(date_str):
+    """ 'YYYYMMDD' 是否為存在的日期 (例如 20251131 不是) """
+    valid = _valid_dates.get(date_str)
+    if valid is None:
+        try:
+            datetime.date(int(date_str[:4]), int(date_str[4:6]), int(date_str[6:]))
+            valid = True
+        except ValueError:
+            valid = False
+        _valid_dates[date_str] = valid
+    return valid
+
+def filename_timestamp(fname):
+    """
+    檔名中的 ('YYYYMMDD', 'HHMMSS')，沒有或不是合法的日期時間時回傳 None
+    fname 可以含子資料夾 (以 / 分隔，與 files.txt 相同)
+    一般的相機檔名直接以切片判斷，有前綴的才用正規表示式，都不必建立 datetime
+    """
+    name = fname.rpartition('/')[2]
+    if name[8:9] == '_' and name[:8].isdigit() and name[9:15].isdigit() and name[:15].isascii():
+        date_str, time_str = name[:8], name[9:15]
+    else:
+        m = PREFIXED_TIMESTAMP_RE.match(name)
+        if not m:
+            return None
+        date_str, time_str = m.groups()
+    # 字串長度固定，直接以字串比較範圍
+    if time_str[:2] > '23' or time_str[2:4] > '59' or time_str[4:] > '59':
+        return None
+    if not is_valid_date(date_str):
+        return None
+    return date_str, time_str
+
+def group_by_date(filenames, capture_times=None):
+    """
+    檔名清單 -> {'YYYYMMDD': [('HHMMSS', 檔名), ...]}，日期由小到大、各日期內依時間排序 (時間相同時依檔名)
+    有媒體目錄 (media_catalog.load_capture_times) 時採用其中的拍攝時間，否則由檔名推測；
+    空字串與推測不出時間的檔名略過
+    """
+    capture_times = capture_times or {}
+    groups = defaultdict(list)
+    for fname in filenames:
+        dt = capture_times.get(fname)
+        if dt:
+            stamp = f"{dt:%Y%m%d%H%M%S}"
+            groups[stamp[:8]].append((stamp[8:], fname))
+            continue
+        parsed = filename_timestamp(fname)
+        if parsed:
+            groups[parsed[0]].append((parsed[1], fname))
+
+    # (時間, 檔名) 的 tuple 直接排序，不需要 key 函式
+    for entries in groups.values():
+        entries.sort()
+    return dict(sorted(groups.items()))
+
+def parse_files(filename, with_time=False):
+    """
+    讀取 files.txt，回傳 {'YYYYMMDD': [{'filename': ..., 'type': 'image'/'video'}, ...]} (build_site_* 共用)
+    with_time=True 時每個檔案另有 'time_str' (HHMM)
+    有媒體目錄時採用其中的拍攝時間 (EXIF)，否則由檔名推測
+    """
+    # media_catalog 也會匯入本模組，在這裡才匯入以免循環匯入
+    import media_catalog
+
+    if not os.path.exists(filename):
+        print(f"錯誤: 找不到 {filename}")
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        names = [line.strip() for line in f]
+
+    files_by_date = {}
+    for date_str, entries in group_by_date(names, media_catalog.load_capture_times()).items():
+        files = []
+        for time_str, fname in entries:
+            entry = {'filename': fname, 'type': 'video' if fname.lower().endswith(media_catalog.VIDEO_EXTS) else 'image'}
+            if with_time:
+                entry['time_str'] = time_str[:4]
+            files.append(entry)
+        files_by_date[date_str] = files
+    return files_by_date
@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import filename_timestamps
+import exclude_list
+
+# 嘗試匯入 Pillow 與 numpy
+try:
+    from PIL import Image
+    import numpy as np
+except ImportError:
+    print("錯誤: 尚未安裝 Pillow 或 numpy 套件。")
+    print("請在終端機執行: pip install Pillow numpy")
+    sys.exit(1)
+
+# --- 設定 ---
+INPUT_FILE = 'files.txt'
+SOURCE_MEDIA_FOLDER = 'media/'
+COMPRESSED_FOLDER = 'photos_compressed/'
+HASH_CACHE_FILE = '.dhash_cache.json'       # 感知雜湊快取 (檔名 -> 檔案大小、修改時間、雜湊)
+REPORT_FILE = 'duplicates_report.txt'
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png')
+
+DEFAULT_WINDOW_SECONDS = 30     # 只比較拍攝時間相差這麼多秒以內的照片
+DEFAULT_MAX_DISTANCE = 10       # 64 位元的 dHash 中，最多幾個位元不同視為同一組
+
+# dHash: 縮成 9x8 灰階，每列比較相鄰像素的明暗，得到 64 位元
+HASH_SIZE = 8
+
+def parse_timestamp(filename):
+    """ 檔名中的拍攝時間 (秒)，例如 20251122_113637.jpg；沒有或不是合法的日期時間時回傳 None """
+    parsed = filename_timestamps.filename_timestamp(filename)
+    if not parsed:
+        return None
+    d, t = parsed
+    days = np.datetime64(f"{d[:4]}-{d[4:6]}-{d[6:]}", 'D').astype('int64')
+    return int(days) * 86400 + int(t[:2]) * 3600 + int(t[2:4]) * 60 + int(t[4:])
+
+def image_path(filename):
+    """ 優先讀取壓縮後的圖片 (小很多)，沒有才讀原圖 """
+    path = os.path.join(COMPRESSED_FOLDER, filename)
+    if os.path.exists(path):
+        return path
+    return os.path.join(SOURCE_MEDIA_FOLDER, filename)
+
+def load_thumbnail(path):
+    """
+    讀取 (HASH_SIZE + 1) x HASH_SIZE 的灰階縮圖
+    JPEG 以 DCT 縮放直接解出約 1/8 的尺寸，不必解碼整張圖
+    """
+    with Image.open(path) as img:
+        img.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BOX)
+    return np.asarray(small, dtype=np.int16)
+
+def load_thumbnail_task(path):
+    """ 子程序用: 讀取失敗時回傳 None """
+    try:
+        return load_thumbnail(path)
+    except Exception:
+        return None
+
+def dhash_batch(thumbnails):
+    """ N 張縮圖 (N x 8 x 9) 一次算出 N 個 64 位元的 dHash """
+    bits = thumbnails[:, :, 1:] > thumbnails[:, :, :-1]
+    return np.packbits(bits.reshape(len(thumbnails), -1), axis=1).view('>u8').ravel().astype(np.uint64)
+
+def popcount(values):
+    """ 每個 uint64 中為 1 的位元數 """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+def load_hash_cache():
+    if not os.path.exists(HASH_CACHE_FILE):
+        return {}
+    try:
+        with open(HASH_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_hash_cache(cache):
+    with open(HASH_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+
+def compute_hashes(filenames, jobs):
+    """
+    回傳 {檔名: 64 位元 dHash}；檔案大小與修改時間沒變的直接使用快取
+    需要重新計算的先全部讀成縮圖 (jobs != 1 時平行讀取)，再以 numpy 一次算出雜湊
+    """
+    cache = load_hash_cache()
+    hashes = {}
+    pending = []
+    new_cache = {}
+    for fname in filenames:
+        path = image_path(fname)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        key = [path, st.st_size, st.st_mtime_ns]
+        cached = cache.get(fname)
+        if cached and cached[:3] == key:
+            hashes[fname] = int(cached[3], 16)
+            new_cache[fname] = cached
+        else:
+            pending.append((fname, key))
+
+    if pending:
+        paths = [key[0] for _, key in pending]
+        if jobs == 1:
+            thumbnails = [load_thumbnail_task(p) for p in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+                thumbnails = list(pool.map(load_thumbnail_task, paths, chunksize=32))
+
+        loaded = [(item, thumb) for item, thumb in zip(pending, thumbnails) if thumb is not None]
+        failed = len(pending) - len(loaded)
+        if failed:
+            print(f"提示: {failed} 張圖片無法讀取，已略過。")
+        if loaded:
+            values = dhash_batch(np.stack([thumb for _, thumb in loaded]))
+            for ((fname, key), _), value in zip(loaded, values):
+                hashes[fname] = int(value)
+                new_cache[fname] = key + [f"{int(value):016x}"]
+
+    save_hash_cache(new_cache)
+    return hashes, len(pending)
+
+def find_similar_pairs(times, hashes, window, max_distance):
+    """
+    依拍攝時間排序後，比較每張照片與其後 window 秒內的照片
+    以「位移 k」為單位向量化: 一次比較所有 (i, i+k)，k 從 1 增加到時間窗內最多的張數
+    回傳 [(i, j, 漢明距離)] (i, j 為排序後的位置)
+    """
+    n = len(times)
+    if n < 2:
+        return []
+    # 每張照片的時間窗內最後一張的位置 -> 需要比較的最大位移
+    ends = np.searchsorted(times, times + window, side='right')
+    max_offset = int((ends - np.arange(n)).max()) - 1
+
+    pairs = []
+    for k in range(1, max_offset + 1):
+        left = np.arange(n - k)
+        in_window = (times[k:] - times[:-k]) <= window
+        distances = popcount(hashes[:-k] ^ hashes[k:])
+        hit = in_window & (distances <= max_distance)
+        for i in left[hit]:
+            pairs.append((int(i), int(i) + k, int(distances[i])))
+    return pairs
+
+def cluster_pairs(n, pairs):
+    """ 以 union-find 把相似的配對連成群組，回傳 [[位置, ...], ...] (只含兩張以上的群組) """
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    groups = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+def read_image_list(filename):
+    if not os.path.exists(filename):
+        print(f"錯誤: 找不到 {filename}")
+        return []
+    with open(filename, 'r', encoding='utf-8') as f:
+        names = [line.strip() for line in f]
+    return list(dict.fromkeys(n for n in names if n.lower().endswith(IMAGE_EXTS)))
+
+def main():
+    """
+    找出連拍與幾乎相同的照片: 以 dHash 比較拍攝時間相近的照片，寫出報告
+    加上 --write-exclude 時，另外把每組中保留以外的照片加進 exclude.txt (保留原有的項目)
+    (每組保留壓縮後檔案最大的一張: 同一場景中，模糊或晃到的照片通常壓縮得更小)
+    """
+    parser = argparse.ArgumentParser(description="找出連拍與幾乎相同的照片")
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW_SECONDS,
+                        help="只比較拍攝時間相差幾秒以內的照片 (預設 30)")
+    parser.add_argument('--max-distance', type=int, default=DEFAULT_MAX_DISTANCE,
+                        help="dHash 最多幾個位元不同 (共 64 位元) 視為相似 (預設 10)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="平行讀取圖片的程序數 (預設 1 = 循序；0 = 依 CPU 核心數)")
+    parser.add_argument('--write-exclude', action='store_true',
+                        help=f"把每組中保留以外的照片加進 {exclude_list.EXCLUDE_FILE}")
+    args = parser.parse_args()
+
+    print("--- 開始尋找相似照片 ---")
+    names = [n for n in read_image_list(INPUT_FILE) if parse_timestamp(n) is not None]
+    if not names:
+        return
+
+    hashes, computed = compute_hashes(names, args.jobs)
+    names = sorted((n for n in names if n in hashes), key=lambda n: (parse_timestamp(n), n))
+    print(f"共 {len(names)} 張照片 (重新計算雜湊 {computed} 張)")
+
+    times = np.array([parse_timestamp(n) for n in names], dtype=np.int64)
+    values = np.array([hashes[n] for n in names], dtype=np.uint64)
+    pairs = find_similar_pairs(times, values, args.window, args.max_distance)
+    groups = cluster_pairs(len(names), pairs)
+
+    distance_of = {}
+    for i, j, d in pairs:
+        distance_of.setdefault(j, d)
+
+    excluded = []
+    with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+        f.write(f"# 相似照片報告: 拍攝時間相差 {args.window:g} 秒以內、dHash 差異 {args.max_distance} 位元以內\n")
+        f.write(f"# 共 {len(groups)} 組\n")
+        for members in groups:
+            files = [names[i] for i in members]
+            keep = max(files, key=lambda n: (os.path.getsize(image_path(n)), n))
+            span = int(times[members[-1]] - times[members[0]])
+            f.write(f"\n## {files[0]} 起 {len(files)} 張 (相距 {span} 秒)\n")
+            for i, fname in zip(members, files):
+                if fname == keep:
+                    f.write(f"保留 {fname}\n")
+                else:
+                    excluded.append(fname)
+                    note = f" (與前一張相似照片差 {distance_of[i]} 位元)" if i in distance_of else ""
+                    f.write(f"排除 {fname}{note}\n")
+
+    print(f"找到 {len(groups)} 組相似照片，建議排除 {len(excluded)} 張 (詳見 {REPORT_FILE})")
+    if args.write_exclude:
+        added = exclude_list.add_to_exclude_list(excluded)
+        print(f"已在 {exclude_list.EXCLUDE_FILE} 新增 {added} 張 (原有的項目保留)，compress_photos 與 generate_date_template 會略過這些照片。")
+
+if __name__ == "__main__":
+    main()
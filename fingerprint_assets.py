@@ -0,0 +1,109 @@
+import os
+import json
+import shutil
+import hashlib
+
+# --- 設定 ---
+CSS_FILE = 'style.css'
+COMPRESSED_FOLDER = 'photos_compressed/'        # 壓縮後的照片 (含各寬度版本、新格式與影片預覽圖)
+ASSET_FOLDER = 'assets/'                        # 加上內容雜湊的副本放在這裡
+ASSET_MANIFEST_FILE = 'asset_manifest.json'     # 原始路徑 -> 副本路徑 (generate_html 會讀取)
+ASSET_EXTS = ('.css', '.jpg', '.jpeg', '.png', '.webp', '.avif')
+HASH_LENGTH = 10                                # 檔名中的雜湊長度 (十六進位字元)
+
+def load_asset_manifest():
+    if not os.path.exists(ASSET_MANIFEST_FILE):
+        return {}
+    try:
+        with open(ASSET_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"提示: 無法讀取 {ASSET_MANIFEST_FILE}，將重新建立。")
+        return {}
+
+def save_asset_manifest(manifest):
+    tmp_path = ASSET_MANIFEST_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, ASSET_MANIFEST_FILE)
+
+def list_assets():
+    """ 網頁會引用的靜態檔 (以 / 分隔的相對路徑，與 HTML 中的網址相同) """
+    paths = [CSS_FILE] if os.path.exists(CSS_FILE) else []
+    for root, dirs, files in os.walk(COMPRESSED_FOLDER):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(ASSET_EXTS):
+                paths.append(os.path.join(root, name).replace(os.sep, '/'))
+    return paths
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fingerprinted_url(path, sha256):
+    """ style.css -> assets/style.3f2a1b9c0d.css """
+    stem, ext = os.path.splitext(path)
+    return f"{ASSET_FOLDER}{stem}.{sha256[:HASH_LENGTH]}{ext}"
+
+def fingerprint_asset(path, previous):
+    """
+    回傳 (manifest 項目, 是否新建了副本)
+    大小與修改時間都和上次相同、副本也還在時沿用上次的結果，不重讀內容
+    """
+    st = os.stat(path)
+    if (previous and previous['bytes'] == st.st_size and previous['mtime_ns'] == st.st_mtime_ns
+            and os.path.exists(previous['url'])):
+        return previous, False
+
+    sha256 = file_sha256(path)
+    url = fingerprinted_url(path, sha256)
+    created = not os.path.exists(url)
+    if created:
+        os.makedirs(os.path.dirname(url), exist_ok=True)
+        # 先寫暫存檔再改名，網址一出現內容就是完整的
+        shutil.copyfile(path, url + '.tmp')
+        os.replace(url + '.tmp', url)
+    return {'url': url, 'sha256': sha256, 'bytes': st.st_size, 'mtime_ns': st.st_mtime_ns}, created
+
+def remove_stale_copies(manifest):
+    """ 刪除 assets/ 中不再被 manifest 引用的副本 (舊版本) """
+    keep = {os.path.normpath(entry['url']) for entry in manifest.values()}
+    removed = 0
+    for root, _, files in os.walk(ASSET_FOLDER):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            if path not in keep:
+                os.remove(path)
+                removed += 1
+    return removed
+
+def main():
+    """
+    為 style.css 與 photos_compressed/ 中的檔案建立加上內容雜湊的副本 (assets/ 之下)，
+    並寫出 asset_manifest.json；之後執行 generate_html 時，網頁中的網址都會改用副本，
+    檔案內容一改網址就跟著改，伺服器可以對 assets/ 設定長期 (immutable) 快取
+    不需要時刪除 asset_manifest.json 即可回到原本的網址
+    """
+    print("--- 開始建立加上內容雜湊的靜態檔副本 ---")
+    previous = load_asset_manifest()
+    manifest = {}
+    created = 0
+    for path in list_assets():
+        manifest[path], is_new = fingerprint_asset(path, previous.get(path))
+        if is_new:
+            created += 1
+            print(f"  [新增] {path} -> {manifest[path]['url']}")
+
+    removed = remove_stale_copies(manifest)
+    save_asset_manifest(manifest)
+
+    print(f"\n任務完成！共 {len(manifest)} 個檔案，新增 {created} 個副本、移除 {removed} 個舊副本。")
+    print(f"副本位於: {ASSET_FOLDER}，對照表: {ASSET_MANIFEST_FILE}")
+    print("請重新執行 generate_html.py，讓網頁改用新的網址。")
+
+if __name__ == "__main__":
+    main()
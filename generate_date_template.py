@@ -1,5 +1,9 @@
 import os
-import sys
+import argparse
+
+import media_catalog
+import filename_timestamps
+import exclude_list
 
 # 設定
 INPUT_FILE = 'files.txt'
@@ -7,66 +11,138 @@ INPUT_FILE = 'files.txt'
 # 預設日期 (如果在執行時沒有給參數，就會用這個)
 DEFAULT_TARGET_DATE = '20251122'
 
-def get_sort_key(filename):
+def get_sort_key(filename, capture_times=None):
     """
     排序用的輔助函式：
-    將 'Screenshot_20251122...' 暫時視為 '20251122...'
-    這樣才能跟一般的相機照片 '20251122...' 依照時間正確穿插排序
+    有媒體目錄 (media_catalog.py) 時採用其中的拍攝時間 (EXIF)；
+    否則採用檔名中的時間 (filename_timestamps)，'Screenshot_20251122...'、'IMG_20251122...'
+    才能跟一般的相機照片 '20251122...' 依照時間正確穿插排序
     """
-    if filename.startswith('Screenshot_'):
-        return filename.replace('Screenshot_', '')
-    return filename
+    dt = (capture_times or {}).get(filename)
+    if dt:
+        return (dt.strftime('%Y%m%d_%H%M%S'), filename)
+    parsed = filename_timestamps.filename_timestamp(filename)
+    if parsed:
+        return (f"{parsed[0]}_{parsed[1]}", filename)
+    return (os.path.basename(filename), filename)
 
-def main():
-    # 1. 決定目標日期
-    # 如果執行指令是 python generate_date_template.py 20251122，就用輸入的日期
-    if len(sys.argv) > 1:
-        target_date = sys.argv[1]
-    else:
-        target_date = DEFAULT_TARGET_DATE
+def get_file_date(fname, capture_times=None):
+    """
+    檔案屬於哪一天 ('YYYYMMDD')，判斷不出來回傳 None
+    判斷邏輯：
+    1. 有媒體目錄時，以拍攝時間 (EXIF) 的日期為準 (修圖匯出、改過名的檔案也能歸到正確的一天)
+    2. 否則依檔名: "20251122_..."、"Screenshot_20251122_..."、"IMG_20251122_..." (規則見 filename_timestamps)
+    """
+    dt = (capture_times or {}).get(fname)
+    if dt:
+        return dt.strftime('%Y%m%d')
+    parsed = filename_timestamps.filename_timestamp(fname)
+    return parsed[0] if parsed else None
+
+def read_file_list(filename):
+    """ files.txt 中的每個檔名 (strip() 會移除前後空白與換行，但不會影響檔名中間的空白) """
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [fname for fname in (line.strip() for line in f) if fname]
+
+def partition_by_date(filenames, excluded=(), capture_times=None):
+    """
+    掃描一次檔名清單，依日期分組，各組依時間排序 (與 get_sort_key 相同的順序)
+    回傳 ({日期: [檔名, ...]}, {日期: 依 exclude.txt 略過的數量})
+    """
+    groups = {}
+    skipped = {}
+    for fname in filenames:
+        date_str = get_file_date(fname, capture_times)
+        if date_str is None:
+            continue
+        if fname in excluded:
+            skipped[date_str] = skipped.get(date_str, 0) + 1
+            continue
+        groups.setdefault(date_str, []).append(fname)
+
+    # 關鍵步驟：依照時間排序
+    # 使用自定義的 key，依拍攝時間 (不是檔名) 比較，截圖等有前綴的檔案才能正確穿插
+    for files in groups.values():
+        files.sort(key=lambda fname: get_sort_key(fname, capture_times))
+    return groups, skipped
+
+def write_template_file(target_date, found_files):
+    """ 寫入 {date}_template.txt；內容與既有檔案相同時保留原檔 (修改時間不變)，回傳是否寫入 """
+    output_filename = f"{target_date}_template.txt"
+    # 這裡保留您原本的格式：檔名 + 空格 + 換行
+    content = ''.join(fname + ' \n' for fname in found_files)
+    if os.path.exists(output_filename):
+        with open(output_filename, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    with open(output_filename, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
 
+def write_date_template(target_date, filenames, excluded=(), capture_times=None):
+    """ 從檔名清單中挑出 target_date 當天的檔案，依時間排序後寫入 {date}_template.txt """
     output_filename = f"{target_date}_template.txt"
     print(f"正在處理日期: {target_date} ...")
 
-    # 2. 讀取 files.txt
-    if not os.path.exists(INPUT_FILE):
-        print(f"錯誤：找不到 {INPUT_FILE}")
-        return
+    groups, skipped = partition_by_date(
+        (fname for fname in filenames if get_file_date(fname, capture_times) == target_date),
+        excluded, capture_times)
+    found_files = groups.get(target_date, [])
 
-    found_files = []
-    
-    with open(INPUT_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            # strip() 會移除前後空白與換行，但不會影響檔名中間的空白
-            fname = line.strip()
-            if not fname: 
-                continue
-            
-            # 判斷邏輯：
-            # 1. 一般照片: "20251122_..."
-            # 2. 截圖: "Screenshot_20251122_..."
-            is_camera_photo = fname.startswith(target_date)
-            is_screenshot = fname.startswith(f"Screenshot_{target_date}")
-
-            if is_camera_photo or is_screenshot:
-                found_files.append(fname)
-
-    # 3. 輸出結果
+    # 輸出結果
     if not found_files:
         print(f"警告：在 {INPUT_FILE} 中找不到日期為 {target_date} 的檔案。")
         return
 
-    # 關鍵步驟：依照時間排序
-    # 使用自定義的 key，忽略 Screenshot_ 前綴來進行比較
-    found_files.sort(key=get_sort_key)
+    if write_template_file(target_date, found_files):
+        print(f"成功！已生成 {output_filename}，包含 {len(found_files)} 個檔案 (含截圖)。")
+    else:
+        print(f"{output_filename} 內容相同，保留原檔 ({len(found_files)} 個檔案)。")
+    if skipped.get(target_date):
+        print(f"依 {exclude_list.EXCLUDE_FILE} 略過 {skipped[target_date]} 個檔案。")
 
-    # 寫入 template txt
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        for fname in found_files:
-            # 這裡保留您原本的格式：檔名 + 空格 + 換行
-            f.write(fname + ' \n')
+def write_all_templates(filenames, excluded=(), capture_times=None):
+    """ 一次讀取檔名清單，為每一天寫出 {date}_template.txt (內容沒變的略過) """
+    groups, skipped = partition_by_date(filenames, excluded, capture_times)
+    if not groups:
+        print(f"警告：在 {INPUT_FILE} 中找不到任何有日期的檔案。")
+        return
+
+    written = 0
+    for target_date in sorted(groups):
+        if write_template_file(target_date, groups[target_date]):
+            written += 1
+            print(f"已生成 {target_date}_template.txt，包含 {len(groups[target_date])} 個檔案。")
+    total_skipped = sum(skipped.values())
+    print(f"共 {len(groups)} 天: 寫入 {written} 個、內容相同 {len(groups) - written} 個。")
+    if total_skipped:
+        print(f"依 {exclude_list.EXCLUDE_FILE} 略過 {total_skipped} 個檔案。")
 
-    print(f"成功！已生成 {output_filename}，包含 {len(found_files)} 個檔案 (含截圖)。")
+def main():
+    """
+    python generate_date_template.py 20251122   生成單一日期的 template
+    python generate_date_template.py --all      一次生成所有日期的 template (只讀一次 files.txt)
+    """
+    parser = argparse.ArgumentParser(description="從 files.txt 生成 {date}_template.txt")
+    parser.add_argument('date', nargs='?', default=DEFAULT_TARGET_DATE,
+                        help=f"目標日期 YYYYMMDD (預設 {DEFAULT_TARGET_DATE})")
+    parser.add_argument('--all', action='store_true', help="為 files.txt 中的每一天各生成一個 template")
+    args = parser.parse_args()
+
+    # 讀取 files.txt
+    if not os.path.exists(INPUT_FILE):
+        if not args.all:
+            print(f"正在處理日期: {args.date} ...")
+        print(f"錯誤：找不到 {INPUT_FILE}")
+        return
+
+    filenames = read_file_list(INPUT_FILE)
+    excluded = exclude_list.load_exclude_list()
+    capture_times = media_catalog.load_capture_times()
+    if args.all:
+        write_all_templates(filenames, excluded, capture_times)
+    else:
+        write_date_template(args.date, filenames, excluded, capture_times)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,32 +1,115 @@
 import os
+import json
+import time
+import filecmp
 
 MEDIA_FOLDER = 'media'
+OUTPUT_FILE = 'files.txt'
+SCAN_CACHE_FILE = '.media_scan_cache.json'   # 每個資料夾的修改時間與內容 (資料夾沒變就不必重新列出)
 
-def main():
-    # 1. 設定要尋找的副檔名
-    target_extensions = ('.jpg', '.mp4')
+# 要列入清單的副檔名 (與 generate_html 的 {date}.txt 接受的相同)
+TARGET_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.mp4', '.mov')
 
-    # 檢查 media 資料夾是否存在
-    if not os.path.exists(MEDIA_FOLDER):
-        print(f"錯誤：找不到 '{MEDIA_FOLDER}' 資料夾。請確認資料夾名稱是否正確。")
-        return
+# 修改時間離現在太近的資料夾不採用快取: 同一個時間刻度內又新增的檔案不會改變資料夾的修改時間
+RACY_SECONDS = 2
+
+def load_scan_cache():
+    if not os.path.exists(SCAN_CACHE_FILE):
+        return {}
+    try:
+        with open(SCAN_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-    # 3. 掃描目錄
-    files = [
-        f for f in os.listdir(MEDIA_FOLDER) 
-        if f.lower().endswith(target_extensions)
-    ]
+def save_scan_cache(cache):
+    with open(SCAN_CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
 
-    # 4. 依照檔名排序
+def list_folder(path, rel, cache, new_cache, now_ns, stats):
+    """
+    資料夾的 (媒體檔名, 子資料夾名)，皆已排序
+    資料夾的修改時間與快取相同時直接沿用 (新增、刪除、改名都會改變資料夾的修改時間)，
+    只有變更過的資料夾才以 scandir 重新列出；以 . 開頭的檔案與資料夾 (例如 .thumbnails) 略過
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = cache.get(rel)
+    if cached and cached['mtime_ns'] == mtime_ns and now_ns - mtime_ns > RACY_SECONDS * 1_000_000_000:
+        stats['cached'] += 1
+        new_cache[rel] = cached
+        return cached['files'], cached['dirs']
+
+    files, dirs = [], []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            elif entry.name.lower().endswith(TARGET_EXTENSIONS):
+                files.append(entry.name)
     files.sort()
+    dirs.sort()
+    stats['scanned'] += 1
+    new_cache[rel] = {'mtime_ns': mtime_ns, 'files': files, 'dirs': dirs}
+    return files, dirs
+
+def iter_media_files(cache, new_cache, stats):
+    """
+    依序產生 media/ 中的媒體檔 (相對路徑，以 / 分隔)：每個資料夾先列檔案、再依名稱進入子資料夾
+    根目錄的檔案沒有前綴，與只有單層資料夾時的 files.txt 相同
+    """
+    now_ns = time.time_ns()
+    stack = [('', MEDIA_FOLDER)]
+    while stack:
+        rel, path = stack.pop()
+        files, dirs = list_folder(path, rel, cache, new_cache, now_ns, stats)
+        prefix = f"{rel}/" if rel else ''
+        for name in files:
+            yield prefix + name
+        # 反向放入堆疊，取出時才會依名稱順序
+        for name in reversed(dirs):
+            stack.append((prefix + name, os.path.join(path, name)))
 
-    # 5. 印出結果並寫入 files.txt
-    print(f"--- 在 {MEDIA_FOLDER} 資料夾中找到 {len(files)} 個檔案 ---")
-    with open('files.txt', 'w', encoding='utf-8') as f:
-        for file in files:
-            f.write(file + '\n')
-    print(f"已成功將 {len(files)} 個檔名寫入 files.txt")
+def write_files_txt(listing=None):
+    """
+    掃描 media/ 並寫出 files.txt；回傳 files.txt 是否有變更
+    listing 為 list 時同時把每個路徑加進去 (run_pipeline 讓後續步驟共用，不必重新讀檔)
+    """
+    # 1. 掃描目錄 (含子資料夾)，邊掃描邊寫入暫存檔，不在記憶體中保留整份清單
+    cache = load_scan_cache()
+    new_cache = {}
+    stats = {'scanned': 0, 'cached': 0}
+    count = 0
+    tmp_path = OUTPUT_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for rel_path in iter_media_files(cache, new_cache, stats):
+            f.write(rel_path + '\n')
+            count += 1
+            if listing is not None:
+                listing.append(rel_path)
+    save_scan_cache(new_cache)
+
+    # 2. 內容相同時保留原檔 (修改時間不變，後續步驟不會以為清單有變)
+    print(f"--- 在 {MEDIA_FOLDER} 資料夾中找到 {count} 個檔案 "
+          f"(重新列出 {stats['scanned']} 個資料夾、沿用快取 {stats['cached']} 個) ---")
+    if os.path.exists(OUTPUT_FILE) and filecmp.cmp(tmp_path, OUTPUT_FILE, shallow=False):
+        os.remove(tmp_path)
+        print(f"{OUTPUT_FILE} 內容相同，保留原檔")
+        changed = False
+    else:
+        os.replace(tmp_path, OUTPUT_FILE)
+        print(f"已成功將 {count} 個檔名寫入 {OUTPUT_FILE}")
+        changed = True
     print("")
+    return changed
+
+def main():
+    # 檢查 media 資料夾是否存在
+    if not os.path.exists(MEDIA_FOLDER):
+        print(f"錯誤：找不到 '{MEDIA_FOLDER}' 資料夾。請確認資料夾名稱是否正確。")
+        return
+    write_files_txt()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
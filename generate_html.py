@@ -1,24 +1,29 @@
 import os
-import sys
+import json
+import re
+import struct
+import filecmp
+import hashlib
+import argparse
 import textwrap
-try:
-    from PIL import Image
-except ImportError:
-    print("錯誤: 需要 Pillow 套件。請執行: pip install Pillow")
-    sys.exit(1)
-
-# --- 使用者設定區 (Hardcoded Dates) ---
-ALL_DATES = [
-    '20251122',
-    '20251123',
-    '20251124',
-    '20251125',
-    '20251126',
-    '20251127',
-    '20251128',
-    '20251129',
-    '20251130',
-]
+import io
+import time
+import threading
+import multiprocessing
+import contextlib
+import functools
+import http.server
+from concurrent.futures import ProcessPoolExecutor
+
+import build_report
+import compressed_names
+import filename_timestamps
+
+# --- 日期 ---
+# 不再手動列出：由 discover_dates() 從目錄中的 {date}.txt 與 files.txt 的拍攝日期推得，
+# 每次建置開始時以 set_dates() 設定
+ALL_DATES = []
+DATE_INDEX = {}  # 日期 -> 在 ALL_DATES 中的位置 (Day N = 位置 + 1)
 
 # --- 路徑設定 ---
 OUTPUT_HTML_IMG_PATH = 'photos_compressed/' # HTML 裡面的 src路徑
@@ -27,10 +32,37 @@ YOUTUBE_ID_FILE = 'youtube_id.txt'
 CSS_FILE = 'style.css'
 INDEX_CONFIG_FILE = 'index.txt'
 SUMMARY_CONFIG_FILE = 'summary.txt'
+MEDIA_LIST_FILE = 'files.txt'
+COMPRESS_MANIFEST_FILE = 'compress_manifest.json'  # compress_photos 產生: 每張圖的尺寸與各寬度版本
+ASSET_MANIFEST_FILE = 'asset_manifest.json'        # fingerprint_assets 產生: 靜態檔 -> 加上內容雜湊的副本
+DIMENSION_CACHE_FILE = '.image_dimensions.json' # 圖片尺寸快取 (檔名 -> 檔案大小、修改時間、寬高)
+BUILD_MANIFEST_FILE = '.build_manifest.json'    # 增量建置紀錄 (頁面 -> 各項輸入的指紋)
+
+# --- 預覽模式設定 (--watch) ---
+WATCH_INTERVAL = 0.5          # 輪詢檔案變更的間隔 (秒)
+PREVIEW_PORT = 8000           # 本機預覽伺服器的埠號
+LIVE_RELOAD_PATH = '/__livereload'
+
+# --- 響應式圖片 (srcset 的 sizes，需與 style.css 的版面一致) ---
+# 內頁: main 最寬 720px，扣掉左右 padding、時間軸與卡片內距後圖片約 630px
+# YouTube 預覽圖 (--youtube-facade): compress_photos 從原始影片擷取的畫面，沒有就用 YouTube 的縮圖
+POSTER_FOLDER = 'posters/'
+YOUTUBE_THUMBNAIL_URL = 'https://i.ytimg.com/vi/{video_id}/hqdefault.jpg'
+
+# 分段載入 (--chunk-size): 日期頁只直接輸出前幾個照片/影片，其餘預先生成片段，捲動到附近時才載入
+FRAGMENT_FOLDER = 'fragments/'
+
+MEDIA_IMG_SIZES = '(max-width: 720px) calc(100vw - 80px), 630px'
+# 首頁: 兩欄卡片，每張約 330px；螢幕較窄時變成單欄
+CARD_IMG_SIZES = '(max-width: 624px) calc(100vw - 30px), 330px'
+
+# compress_photos --formats 產生的新格式 (依優先順序)，瀏覽器不支援時退回 JPEG
+ALTERNATE_FORMATS = (('avif', 'image/avif'), ('webp', 'image/webp'))
 
 # --- 輔助函式 ---
 
 def load_youtube_ids(filename):
+    """ {影片檔名: {'id': YouTube ID, 'shorts': 是否為 shorts 網址 (直式影片)}} """
     mapping = {}
     if not os.path.exists(filename):
         return mapping
@@ -44,12 +76,105 @@ def load_youtube_ids(filename):
                     if '=' in url_or_id: vid_id = url_or_id.split('=')[-1]
                     else: vid_id = url_or_id.split('/')[-1]
                 else: vid_id = url_or_id
-                mapping[fname] = vid_id
+                mapping[fname] = {'id': vid_id, 'shorts': '/shorts/' in url_or_id}
     return mapping
 
-def get_image_dimensions(filename):
-    path = os.path.join(LOCAL_IMG_FOLDER, filename)
-    if not os.path.exists(path):
+# --- 圖片尺寸快取 ---
+# _dimension_memo: 本次執行中已查過的結果 (封面圖會在 index 再查一次)
+# _dimension_index: 磁碟上的快取，以 (檔案大小, 修改時間) 判斷是否過期
+# _dimension_updates: 本次新查到的項目 (平行建置時由子程序交回主程序合併)
+_dimension_memo = {}
+_dimension_index = None
+_dimension_updates = {}
+
+def load_dimension_index():
+    """ 讀取圖片尺寸快取檔 (每次執行只讀一次) """
+    global _dimension_index
+    if _dimension_index is None:
+        _dimension_index = {}
+        if os.path.exists(DIMENSION_CACHE_FILE):
+            try:
+                with open(DIMENSION_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    _dimension_index = json.load(f)
+            except (OSError, ValueError):
+                print(f"提示: 無法讀取 {DIMENSION_CACHE_FILE}，將重新建立圖片尺寸快取。")
+    return _dimension_index
+
+def save_dimension_index():
+    """ 有新查到的尺寸才寫回快取檔 (先寫暫存檔再取代，避免中斷時留下壞檔) """
+    if not _dimension_updates:
+        return
+    tmp_path = DIMENSION_CACHE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(load_dimension_index(), f)
+    os.replace(tmp_path, DIMENSION_CACHE_FILE)
+    _dimension_updates.clear()
+
+def pop_dimension_updates():
+    """ 取出並清空本次新查到的尺寸 (子程序回傳給主程序用) """
+    updates = dict(_dimension_updates)
+    _dimension_updates.clear()
+    return updates
+
+def merge_dimension_updates(updates):
+    """ 合併子程序查到的尺寸，之後由 save_dimension_index 一併寫回 """
+    load_dimension_index().update(updates)
+    _dimension_updates.update(updates)
+
+# JPEG 的 SOF (Start Of Frame) 標記，C4/C8/CC 不是 SOF 所以排除
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def probe_image_size(path):
+    """
+    只讀檔頭取得寬高，不經過 Pillow
+    JPEG: 逐段跳過 APPn/DQT 等區段，直到 SOF 標記
+    PNG: 直接讀第一個 IHDR chunk
+    無法辨識的格式回傳 None
+    """
+    with open(path, 'rb') as f:
+        head = f.read(24)
+        if head[:8] == PNG_SIGNATURE and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:2] != b'\xff\xd8':
+            return None
+
+        pos = 2
+        while True:
+            f.seek(pos)
+            seg = f.read(9)
+            if len(seg) < 4 or seg[0] != 0xFF:
+                return None
+            marker = seg[1]
+            if marker == 0xFF: # 填充位元組
+                pos += 1
+                continue
+            if marker in JPEG_SOF_MARKERS:
+                if len(seg) < 9:
+                    return None
+                height, width = struct.unpack('>HH', seg[5:9])
+                # 高度為 0 代表寫在 DNL 區段，交給 Pillow 處理
+                return (width, height) if width and height else None
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8: # 沒有長度欄位的標記
+                pos += 2
+                continue
+            if marker in (0xD9, 0xDA): # EOI / SOS 之前都沒找到 SOF
+                return None
+            pos += 2 + struct.unpack('>H', seg[2:4])[0]
+
+def read_image_dimensions(path):
+    """ 讀取圖片寬高 (快取沒有命中時才會呼叫)，JPEG/PNG 以外才動用 Pillow """
+    try:
+        dims = probe_image_size(path)
+    except (OSError, struct.error):
+        dims = None
+    if dims:
+        return dims
+
+    try:
+        from PIL import Image
+    except ImportError:
+        print(f"錯誤: 需要 Pillow 套件才能讀取 {path} 的尺寸。請執行: pip install Pillow")
         return None, None
     try:
         with Image.open(path) as img:
@@ -57,6 +182,135 @@ def get_image_dimensions(filename):
     except:
         return None, None
 
+def get_image_dimensions(filename):
+    if filename in _dimension_memo:
+        return _dimension_memo[filename]
+
+    path = os.path.join(LOCAL_IMG_FOLDER, filename)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+
+    # 檔案大小或修改時間變了 (例如重新壓縮過) 就視為過期，重新讀取
+    index = load_dimension_index()
+    entry = index.get(filename)
+    if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+        dims = (entry[2], entry[3])
+    else:
+        dims = read_image_dimensions(path)
+        entry = [st.st_size, st.st_mtime_ns, dims[0], dims[1]]
+        index[filename] = entry
+        _dimension_updates[filename] = entry
+
+    _dimension_memo[filename] = dims
+    return dims
+
+# --- 圖片資訊 (尺寸與響應式版本) ---
+
+_compress_manifest = None
+
+def get_compress_entry(filename):
+    """ compress_manifest.json 中這張圖的項目 (沒有執行過 compress_photos 時為 None) """
+    global _compress_manifest
+    if _compress_manifest is None:
+        _compress_manifest = {}
+        if os.path.exists(COMPRESS_MANIFEST_FILE):
+            try:
+                with open(COMPRESS_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    _compress_manifest = json.load(f)
+            except (OSError, ValueError):
+                print(f"提示: 無法讀取 {COMPRESS_MANIFEST_FILE}，將不輸出 srcset。")
+    return _compress_manifest.get(filename)
+
+def reset_compress_manifest():
+    """ 預覽模式下每次建置前重新讀取 """
+    global _compress_manifest, _asset_manifest
+    _compress_manifest = None
+    _asset_manifest = None
+
+# --- 靜態檔網址 (加上內容雜湊的副本) ---
+
+_asset_manifest = None
+
+def load_asset_manifest():
+    """ asset_manifest.json (沒有執行過 fingerprint_assets 時為空) """
+    global _asset_manifest
+    if _asset_manifest is None:
+        _asset_manifest = {}
+        if os.path.exists(ASSET_MANIFEST_FILE):
+            try:
+                with open(ASSET_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    _asset_manifest = json.load(f)
+            except (OSError, ValueError):
+                print(f"提示: 無法讀取 {ASSET_MANIFEST_FILE}，將使用原本的網址。")
+    return _asset_manifest
+
+def is_asset_current(path, entry):
+    """ 建立副本之後原檔是否沒再變更 (以檔案大小與修改時間判斷) """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == entry['bytes'] and st.st_mtime_ns == entry['mtime_ns']
+
+def asset_url(path):
+    """
+    靜態檔在網頁中的網址: 有副本且原檔沒再變更時改用副本 (assets/ 之下、檔名含內容雜湊)，
+    否則用原本的路徑，不會指向過期的內容
+    """
+    entry = load_asset_manifest().get(path)
+    if entry and is_asset_current(path, entry):
+        return entry['url']
+    return path
+
+def count_stale_assets():
+    """ 建立副本之後又變更過的檔案數 (這些檔案暫時使用原本的網址) """
+    return sum(1 for path, entry in load_asset_manifest().items() if not is_asset_current(path, entry))
+
+def get_image_info(filename):
+    """
+    一張圖片在頁面上需要的資訊: {'src', 'width', 'height', 'srcset', 'sources', 'placeholder'}
+    sources 是 <picture> 的新格式來源 [{'type', 'srcset'}]，沒有則為空
+    placeholder 是壓縮時算好的主色 (#rrggbb)，圖片載入前當作底色，沒有則為 None
+    尺寸優先採用壓縮時記錄的值 (與各寬度版本同一輪產生)，沒有才讀取圖片檔
+    網址都經過 asset_url (有 asset_manifest.json 時改用加上內容雜湊的副本)，同時也是增量建置的輸入之一
+    """
+    path = f"{OUTPUT_HTML_IMG_PATH}{filename}"
+    entry = get_compress_entry(filename)
+    if entry:
+        w, h = entry['size']
+    else:
+        w, h = get_image_dimensions(filename)
+
+    srcset = None
+    sources = []
+    if entry and w:
+        # 寬度 -> JPEG 的路徑 (主圖 + 各寬度版本)
+        paths = {vw: f"{OUTPUT_HTML_IMG_PATH}{vw}w/{filename}" for vw, _ in entry.get('variants', {}).values()}
+        paths[w] = path
+        if len(paths) > 1:
+            srcset = ", ".join(f"{asset_url(paths[vw])} {vw}w" for vw in sorted(paths))
+
+        # 新格式與主圖同路徑 (檔名規則見 compressed_names)；依 ALTERNATE_FORMATS 的順序 (較好的格式優先)
+        for fmt, mime in ALTERNATE_FORMATS:
+            widths = entry.get('formats', {}).get(fmt)
+            if widths:
+                fmt_srcset = ", ".join(f"{asset_url(compressed_names.alternate_name(paths[vw], fmt))} {vw}w"
+                                       for vw in sorted(widths) if vw in paths)
+                sources.append({'type': mime, 'srcset': fmt_srcset})
+
+    placeholder = entry.get('placeholder', {}).get('color') if entry else None
+    return {'src': asset_url(path), 'width': w, 'height': h, 'srcset': srcset, 'sources': sources, 'placeholder': placeholder}
+
+def get_video_poster(filename, video):
+    """ 影片預覽圖: {'src', 'width', 'height'}；沒有擷取過的影片改用 YouTube 的縮圖 (尺寸不明) """
+    poster = f"{POSTER_FOLDER}{os.path.splitext(filename)[0]}.jpg"
+    w, h = get_image_dimensions(poster)
+    if w and h:
+        return {'src': asset_url(f"{OUTPUT_HTML_IMG_PATH}{poster}"), 'width': w, 'height': h}
+    return {'src': YOUTUBE_THUMBNAIL_URL.format(video_id=video['id']), 'width': None, 'height': None}
+
 def get_date_display(date_str):
     if len(date_str) != 8: return date_str
     return f"{date_str[:4]} 年 {date_str[4:6]} 月 {date_str[6:]} 日"
@@ -65,15 +319,27 @@ def get_formatted_date(date_str):
     if len(date_str) != 8: return date_str
     return f"{date_str[:4]}.{date_str[4:6]}.{date_str[6:]}"
 
-def get_js_content():
+@functools.lru_cache(maxsize=None)
+def get_js_content(chunked=False):
+    """ chunked: 頁面有分段載入的片段 (CHUNK_LOADER_SCRIPT) 時，每載入一段就重新取得段落清單 """
+    if chunked:
+        sections = """
+        let sections = document.querySelectorAll('.section-anchor');
+        let isClicking = false;
+        // 分段載入後會多出新的段落
+        document.addEventListener('timeline-chunk-loaded', function() {
+            sections = document.querySelectorAll('.section-anchor');
+        });"""
+    else:
+        sections = """
+        const sections = document.querySelectorAll('.section-anchor');
+        let isClicking = false;"""
     return textwrap.dedent("""
     <script>
     document.addEventListener('DOMContentLoaded', function() {
         const navLinks = document.querySelectorAll('.sub-nav-inner a');
         if(navLinks.length === 0) return;
-
-        const sections = document.querySelectorAll('.section-anchor');
-        let isClicking = false;
+""" + sections + """
 
         navLinks.forEach(link => {
             link.addEventListener('click', function(e) {
@@ -109,18 +375,199 @@ def get_js_content():
     </script>
     """).strip()
 
+# --- 日期與導航列 ---
+
+DATE_TXT_RE = re.compile(r'(\d{8})\.txt')
+
+# 導航列的共用外框：每個連結的一般/active 版本只在 set_dates() 時組一次，
+# 各頁面只替換自己那一格，不必每頁重跑整個日期迴圈或 ALL_DATES.index()
+_nav_links = []
+_nav_active_links = []
+_nav_position = {}  # 'home' / 日期 / 'summary' -> 連結位置
+
+def discover_dates():
+    """
+    日期列表: 目錄中所有 {date}.txt，加上 files.txt 中出現過的拍攝日期
+    (還沒寫遊記的日子也會有頁面)
+    """
+    dates = set()
+    for name in os.listdir('.'):
+        m = DATE_TXT_RE.fullmatch(name)
+        if m:
+            dates.add(m.group(1))
+    if os.path.exists(MEDIA_LIST_FILE):
+        with open(MEDIA_LIST_FILE, 'r', encoding='utf-8') as f:
+            # 與 build_site_*、generate_date_template 相同的檔名規則 (filename_timestamps)
+            for line in f:
+                parsed = filename_timestamps.filename_timestamp(line.strip())
+                if parsed:
+                    dates.add(parsed[0])
+    return sorted(dates)
+
+def set_dates(dates):
+    """ 設定日期列表，並預先建好日期索引與導航列的連結 """
+    global ALL_DATES, DATE_INDEX, _nav_links, _nav_active_links, _nav_position
+    ALL_DATES = list(dates)
+    DATE_INDEX = {date_str: i for i, date_str in enumerate(ALL_DATES)}
+
+    entries = [('home', 'index.html', '首頁')]
+    entries += [(date_str, f'{date_str}.html', f'Day {i+1}') for i, date_str in enumerate(ALL_DATES)]
+    entries.append(('summary', 'summary.html', '總結'))
+    _nav_links = [f'<a href="{href}">{text}</a>' for _, href, text in entries]
+    _nav_active_links = [f'<a href="{href}" class="active">{text}</a>' for _, href, text in entries]
+    _nav_position = {key: i for i, (key, _, _) in enumerate(entries)}
+
 def get_navbar_html(current_page_key):
-    links = []
-    cls = ' class="active"' if current_page_key == 'home' else ''
-    links.append(f'<a href="index.html"{cls}>首頁</a>')
-    for i, date_str in enumerate(ALL_DATES):
-        cls = ' class="active"' if current_page_key == date_str else ''
-        links.append(f'<a href="{date_str}.html"{cls}>Day {i+1}</a>')
-    cls = ' class="active"' if current_page_key == 'summary' else ''
-    links.append(f'<a href="summary.html"{cls}>總結</a>')
-    return f'<nav class="main-nav"><div class="nav-inner">{"".join(links)}</div></nav>'
+    pos = _nav_position.get(current_page_key)
+    if pos is None:
+        links = "".join(_nav_links)
+    else:
+        links = "".join(_nav_links[:pos]) + _nav_active_links[pos] + "".join(_nav_links[pos+1:])
+    return f'<nav class="main-nav"><div class="nav-inner">{links}</div></nav>'
+
+# --- 增量建置 (Build Manifest) ---
+
+def fingerprint(value):
+    """ 將可 JSON 化的輸入轉成雜湊值 """
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+def file_fingerprint(filename):
+    """ 檔案內容的雜湊值，檔案不存在回傳 None """
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+# 本程式自身的雜湊：修改版型或邏輯後，所有頁面都會重新生成
+GENERATOR_FINGERPRINT = file_fingerprint(os.path.abspath(__file__))
+
+def load_build_manifest():
+    if not os.path.exists(BUILD_MANIFEST_FILE):
+        return {}
+    try:
+        with open(BUILD_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"提示: 無法讀取 {BUILD_MANIFEST_FILE}，將重新生成所有頁面。")
+        return {}
+
+def save_build_manifest(manifest):
+    tmp_path = BUILD_MANIFEST_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, BUILD_MANIFEST_FILE)
+
+def remove_stale_outputs(manifest, new_manifest):
+    """ 上次有生成、這次不再生成的頁面 (例如刪掉了某天的 txt) 一併移除 """
+    for output in sorted(manifest.keys() - new_manifest.keys()):
+        if os.path.exists(output):
+            os.remove(output)
+            record_output('removed', output)
+            print(f"已移除: {output}")
+        # 該日期頁分段載入的片段
+        remove_stale_fragments(os.path.splitext(output)[0])
+
+def fragment_path(date_str, n):
+    """ 日期頁第 n 段 (從 1 起算) 的片段檔 """
+    return f"{FRAGMENT_FOLDER}{date_str}-{n}.html"
+
+def remove_stale_fragments(date_str, keep=()):
+    """ 移除該日期不在 keep 中的片段檔 (段數變少、或關閉了分段載入) """
+    if not os.path.isdir(FRAGMENT_FOLDER):
+        return
+    prefix = f"{date_str}-"
+    for name in sorted(os.listdir(FRAGMENT_FOLDER)):
+        path = f"{FRAGMENT_FOLDER}{name}"
+        if name.startswith(prefix) and name.endswith('.html') and path not in keep:
+            os.remove(path)
+            record_output('removed', path)
+            print(f"已移除: {path}")
+
+def get_date_page_inputs(date_str, blocks, youtube_map, site_title, youtube_facade=False, chunk_size=0):
+    """
+    {date}.html 的輸入: 當天 txt、用到的 YouTube ID (預覽模式下含預覽圖)、網站標題、日期列表、
+    嵌入的圖片資訊 (尺寸、srcset)、樣式表網址、分段載入的每段項目數
+    """
+    videos = {}
+    images = {}
+    for b in blocks:
+        if b['type'] != 'media':
+            continue
+        if b['is_video']:
+            video = youtube_map.get(b['filename'])
+            if video and youtube_facade:
+                video = dict(video, poster=get_video_poster(b['filename'], video))
+            videos[b['filename']] = video
+        else:
+            images[b['filename']] = get_image_info(b['filename'])
+    return {
+        'generator': GENERATOR_FINGERPRINT,
+        'source': file_fingerprint(f"{date_str}.txt"),
+        'youtube': fingerprint(videos),
+        'site_title': fingerprint(site_title),
+        'dates': fingerprint(ALL_DATES),
+        'images': fingerprint(images),
+        'stylesheet': fingerprint(asset_url(CSS_FILE)),
+        'chunk_size': chunk_size,
+    }
+
+def get_index_page_inputs(day_infos, cover_map):
+    """ index.html 的輸入: index.txt、每天的項目數與封面、封面圖片資訊、日期列表、樣式表網址 """
+    covers = [cover_map.get(info['date'], info['cover']) for info in day_infos]
+    covers.append(cover_map.get('summary', ''))
+    images = {c: get_image_info(c) for c in covers if c}
+    return {
+        'generator': GENERATOR_FINGERPRINT,
+        'source': file_fingerprint(INDEX_CONFIG_FILE),
+        'days': fingerprint(day_infos),
+        'dates': fingerprint(ALL_DATES),
+        'images': fingerprint(images),
+        'stylesheet': fingerprint(asset_url(CSS_FILE)),
+    }
+
+def get_summary_page_inputs(site_title):
+    """ summary.html 的輸入: summary.txt、網站標題、日期列表、樣式表網址 """
+    return {
+        'generator': GENERATOR_FINGERPRINT,
+        'source': file_fingerprint(SUMMARY_CONFIG_FILE),
+        'site_title': fingerprint(site_title),
+        'dates': fingerprint(ALL_DATES),
+        'stylesheet': fingerprint(asset_url(CSS_FILE)),
+    }
+
+def needs_rebuild(output, inputs, manifest, force):
+    """ 輸出檔不存在、強制重建、或任一輸入的指紋與上次不同時，才需要重新生成 """
+    if force or not os.path.exists(output):
+        return True
+    previous = manifest.get(output)
+    if previous == inputs:
+        print(f"略過: {output} (輸入未變更)")
+        record_output('unchanged', output)
+        return False
+    if previous:
+        changed = [k for k in inputs if previous.get(k) != inputs[k]]
+        print(f"重新生成: {output} (變更: {', '.join(changed)})")
+    return True
 
 # --- 解析邏輯 (Parsing Logic) ---
+# index.txt、summary.txt、{date}.txt 共用同一套語法，由 parse_blocks 單次掃描解析:
+#   p / end p                      -> journal 區塊 (第一行為標題，其餘為內容)
+#   section / end section          -> 段落標題 (日期頁的子導航)
+#   front cover / end front cover  -> 封面設定，每行為「日期 檔名」(只有 index.txt 可用，其他檔案中略過)
+#   其他行: 檔名 [圖說]             -> 照片或影片 (日期頁)
+# 每個區塊都記錄起始行號，方便回報格式錯誤
+
+DSL_LINE_RE = re.compile(r"""
+    (?P<keyword>(?:end\ )?(?:p|section|front\ cover))
+  | (?P<filename>.*?\.(?i:jpg|jpeg|png|mp4|mov))(?:\ (?P<caption>.*))?
+""", re.VERBOSE)
+
+VIDEO_EXTS = ('.mp4', '.mov')
+
+def read_dsl_lines(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return [l.rstrip() for l in f] # 保留空白行結構但去除尾端換行
 
 def parse_p_block(buffer):
     """
@@ -133,6 +580,89 @@ def parse_p_block(buffer):
     content = "<br>".join(buffer[1:]) if len(buffer) > 1 else ""
     return title, content
 
+def parse_blocks(lines, source, allow_cover=False):
+    """
+    單次掃描，回傳區塊列表 (依出現順序):
+    {'type': 'journal', 'title', 'content'} / {'type': 'section', 'title', 'id'}
+    {'type': 'cover', 'key', 'filename'} / {'type': 'media', 'filename', 'caption', 'is_video'}
+    每個區塊另有 'line' (起始行號)
+    allow_cover: 是否接受 front cover 區塊 (只有 index.txt)；否則該行與 end front cover 都略過
+    """
+    blocks = []
+    mode = None      # 目前所在的區塊: None / 'p' / 'section' / 'front cover'
+    mode_line = 0
+    mode_warned = False
+    buffer = []
+    section_counter = 0
+
+    for lineno, line in enumerate(lines, 1):
+        stripped = line.strip()
+        m = DSL_LINE_RE.fullmatch(stripped)
+        keyword = m.group('keyword') if m else None
+        if keyword and keyword.endswith('front cover') and not allow_cover:
+            print(f"警告: {source} 第 {lineno} 行的 '{keyword}' 只能用在 {INDEX_CONFIG_FILE}，已略過。")
+            continue
+
+        # 1. 區塊內: 只有對應的 end 會結束區塊，其他行都是內容
+        if mode is not None:
+            # 忘了寫 end 時，後面的照片會全部被當成區塊內容: 在第一個這樣的檔名提醒
+            if mode != 'front cover' and m and m.group('filename') and not mode_warned:
+                print(f"警告: {source} 第 {lineno} 行的檔名位於第 {mode_line} 行開始的 '{mode}' 區塊內 "
+                      f"(缺少 'end {mode}'？)，將當成區塊內容而不是照片/影片。")
+                mode_warned = True
+            if keyword == 'end ' + mode:
+                if mode == 'p':
+                    title, content = parse_p_block(buffer)
+                    if title:
+                        blocks.append({'type': 'journal', 'title': title, 'content': content, 'line': mode_line})
+                elif mode == 'section' and buffer:
+                    blocks.append({
+                        'type': 'section',
+                        'title': " ".join(buffer),
+                        'id': f'sec-{section_counter}',
+                        'line': mode_line
+                    })
+                    section_counter += 1
+                mode = None
+            elif mode == 'p':
+                buffer.append(line) # 保留原始行內容 (含空白)
+            elif mode == 'section':
+                if stripped: buffer.append(stripped)
+            elif stripped: # front cover
+                parts = stripped.split(maxsplit=1)
+                if len(parts) == 2:
+                    blocks.append({'type': 'cover', 'key': parts[0], 'filename': parts[1], 'line': lineno})
+                else:
+                    print(f"警告: {source} 第 {lineno} 行的封面設定應為「日期 檔名」，已略過: {stripped}")
+            continue
+
+        # 2. 區塊開頭 (或多餘的 end)
+        if keyword:
+            if keyword.startswith('end '):
+                print(f"警告: {source} 第 {lineno} 行的 '{keyword}' 沒有對應的開頭，已略過。")
+            else:
+                mode = keyword
+                mode_line = lineno
+                mode_warned = False
+                buffer = []
+            continue
+
+        # 3. Media: 檔名 (可含空格) + 空格 + 圖說；以最早出現的「副檔名 + 空格」切開
+        if m and m.group('filename'):
+            fname = m.group('filename')
+            blocks.append({
+                'type': 'media',
+                'filename': fname,
+                'caption': (m.group('caption') or '').strip(),
+                'is_video': fname.lower().endswith(VIDEO_EXTS),
+                'line': lineno
+            })
+
+    if mode is not None:
+        print(f"警告: {source} 第 {mode_line} 行的 '{mode}' 缺少 'end {mode}'，此區塊已略過。")
+
+    return blocks
+
 def parse_index_txt():
     """
     讀取 index.txt
@@ -140,14 +670,11 @@ def parse_index_txt():
     """
     default_title = "我的旅遊日誌"
     default_subtitle = "收藏美好的時光與回憶"
-    cover_map = {}
-    journal_blocks = []
 
     if not os.path.exists(INDEX_CONFIG_FILE):
-        return default_title, default_subtitle, cover_map, journal_blocks
+        return default_title, default_subtitle, {}, []
 
-    with open(INDEX_CONFIG_FILE, 'r', encoding='utf-8') as f:
-        lines = [l.rstrip() for l in f.readlines()] # 保留空白行結構但去除尾端換行
+    lines = read_dsl_lines(INDEX_CONFIG_FILE)
 
     # 讀取標題 (Line 1) 和 副標題 (Line 2)
     # 過濾掉開頭的空行
@@ -155,44 +682,9 @@ def parse_index_txt():
     main_title = content_lines[0] if len(content_lines) > 0 else default_title
     subtitle = content_lines[1] if len(content_lines) > 1 else default_subtitle
 
-    # 狀態機解析
-    in_cover = False
-    in_p = False
-    p_buffer = []
-
-    for line in lines:
-        stripped = line.strip()
-        
-        # 狀態切換: front cover
-        if stripped == 'front cover':
-            in_cover = True
-            continue
-        elif stripped == 'end front cover':
-            in_cover = False
-            continue
-        
-        # 狀態切換: p
-        if stripped == 'p':
-            in_p = True
-            p_buffer = []
-            continue
-        elif stripped == 'end p':
-            in_p = False
-            title, content = parse_p_block(p_buffer)
-            if title:
-                journal_blocks.append({'title': title, 'content': content})
-            continue
-
-        # 處理內容
-        if in_cover and stripped:
-            # 格式: DATE FILENAME (e.g., 20251122 img.jpg)
-            parts = stripped.split(maxsplit=1)
-            if len(parts) == 2:
-                cover_map[parts[0]] = parts[1]
-        
-        elif in_p:
-            # p 區塊內保留原樣 (包含空字串，轉成換行)
-            p_buffer.append(line)
+    blocks = parse_blocks(lines, INDEX_CONFIG_FILE, allow_cover=True)
+    cover_map = {b['key']: b['filename'] for b in blocks if b['type'] == 'cover'}
+    journal_blocks = [b for b in blocks if b['type'] == 'journal']
 
     return main_title, subtitle, cover_map, journal_blocks
 
@@ -203,36 +695,17 @@ def parse_summary_txt():
     """
     default_title = "旅程總結"
     default_subtitle = ""
-    journal_blocks = []
 
     if not os.path.exists(SUMMARY_CONFIG_FILE):
-        return default_title, default_subtitle, journal_blocks
+        return default_title, default_subtitle, []
 
-    with open(SUMMARY_CONFIG_FILE, 'r', encoding='utf-8') as f:
-        lines = [l.rstrip() for l in f.readlines()]
+    lines = read_dsl_lines(SUMMARY_CONFIG_FILE)
 
     content_lines = [l for l in lines if l]
     title = content_lines[0] if len(content_lines) > 0 else default_title
     subtitle = content_lines[1] if len(content_lines) > 1 else default_subtitle
 
-    in_p = False
-    p_buffer = []
-
-    for line in lines:
-        stripped = line.strip()
-        if stripped == 'p':
-            in_p = True
-            p_buffer = []
-            continue
-        elif stripped == 'end p':
-            in_p = False
-            j_title, j_content = parse_p_block(p_buffer)
-            if j_title:
-                journal_blocks.append({'title': j_title, 'content': j_content})
-            continue
-        
-        if in_p:
-            p_buffer.append(line)
+    journal_blocks = [b for b in parse_blocks(lines, SUMMARY_CONFIG_FILE) if b['type'] == 'journal']
 
     return title, subtitle, journal_blocks
 
@@ -240,124 +713,336 @@ def parse_date_txt(date_str):
     """
     讀取 {date}.txt
     格式更新: text/end text -> p/end p (第一行為標題)
+    回傳: (blocks, media_count, first_image)
     """
     filename = f"{date_str}.txt"
     if not os.path.exists(filename):
         print(f"提示: 找不到 {filename}，將略過此日期內容。")
         return [], 0, None
 
-    blocks = []
+    blocks = [b for b in parse_blocks(read_dsl_lines(filename), filename) if b['type'] != 'cover']
+
     media_count = 0
     first_image = None
-    
-    in_section = False
-    in_p = False
-    
-    section_buffer = []
-    p_buffer = []
-    section_counter = 0
+    for b in blocks:
+        if b['type'] == 'media':
+            media_count += 1
+            if not b['is_video'] and first_image is None:
+                first_image = b['filename']
 
-    with open(filename, 'r', encoding='utf-8') as f:
-        lines = [l.rstrip() for l in f.readlines()]
+    return blocks, media_count, first_image
 
-    for line in lines:
-        stripped = line.strip()
-        
-        # 1. Section
-        if stripped == 'section':
-            in_section = True
-            section_buffer = []
-            continue
-        elif stripped == 'end section':
-            in_section = False
-            if section_buffer:
-                title = " ".join(section_buffer)
-                blocks.append({
-                    'type': 'section',
-                    'title': title,
-                    'id': f'sec-{section_counter}'
-                })
-                section_counter += 1
-            continue
-        
-        if in_section:
-            if stripped: section_buffer.append(stripped)
-            continue
+# --- HTML 片段樣板 ---
+# 每種片段的樣板只在載入時去除一次縮排，生成時直接 format，
+# 不必為每個項目重組大段 f-string 再跑一次 textwrap.dedent
+
+def compile_fragment(template):
+    """ 去除樣板的共同縮排，回傳其 format 方法 """
+    return textwrap.dedent(template).strip('\n').format
+
+# section 的兩行在時間軸內保留 4 格縮排
+render_section_header = (
+    '    <div id="{id}" class="section-anchor"></div>\n'
+    '    <div class="section-header"><span class="section-dot"></span><h2>{title}</h2></div>'
+).format
+
+render_journal_block = compile_fragment("""
+    <div class="journal-block">
+        <h3>{title}</h3>
+        <p>{content}</p>
+    </div>
+""")
+
+render_media_item = compile_fragment("""
+    <article class="media-item">
+        <div class="media-content">{media}</div>
+        <div class="caption">
+            <div>{caption}</div>
+            <div class="filename-ref">{filename}</div>
+        </div>
+    </article>
+""")
+
+render_day_card = compile_fragment("""
+    <a href="{href}" class="day-card">
+        <div class="card-img-wrap">{img}</div>
+        <div class="card-content"><h3>{title}</h3><p>{meta}</p></div>
+    </a>
+""")
+
+render_image = '<img src="{src}"{attr}>'.format
+render_responsive_image = '<img src="{src}" srcset="{srcset}" sizes="{sizes}"{attr}>'.format
+render_picture = '<picture>{sources}{img}</picture>'.format
+render_picture_source = '<source type="{type}" srcset="{srcset}" sizes="{sizes}">'.format
+render_media_img_attr = ' width="{w}" height="{h}" loading="lazy" style="aspect-ratio:{w}/{h};{style}"'.format
+render_card_img_attr = ' width="{w}" height="{h}" style="aspect-ratio:{w}/{h};{style}" loading="lazy"'.format
+render_placeholder_style = 'background:{color};'.format
+render_youtube_iframe = (
+    '<iframe width="100%" height="100%" '
+    'src="https://www.youtube.com/embed/{video_id}?rel=0" '
+    'title="YouTube video player" frameborder="0" '
+    'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" '
+    'referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>'
+).format
+render_missing_video = (
+    '<div style="padding:40px;background:#eee;text-align:center;color:#666;">影片 {filename} 尚未設定 YouTube ID</div>'
+).format
+
+render_youtube_facade = (
+    '<a class="yt-facade{shorts}" href="https://www.youtube.com/watch?v={video_id}" '
+    'data-video-id="{video_id}" aria-label="播放 YouTube 影片">'
+    '<img src="{poster}"{attr} alt="" loading="lazy"><span class="yt-play"></span></a>'
+).format
+render_poster_attr = ' width="{w}" height="{h}"'.format
+
+# 預覽模式: 點擊預覽圖時才換成 iframe (沒有 JavaScript 時連結直接開啟 YouTube)
+YOUTUBE_FACADE_SCRIPT = textwrap.dedent("""
+<script>
+document.addEventListener('click', function(e) {
+    const facade = e.target.closest('.yt-facade');
+    if (!facade) return;
+    e.preventDefault();
+    const iframe = document.createElement('iframe');
+    iframe.src = 'https://www.youtube.com/embed/' + facade.dataset.videoId + '?rel=0&autoplay=1';
+    iframe.title = 'YouTube video player';
+    iframe.allow = 'accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share';
+    iframe.referrerPolicy = 'strict-origin-when-cross-origin';
+    iframe.allowFullscreen = true;
+    if (facade.classList.contains('yt-shorts')) iframe.classList.add('yt-shorts');
+    facade.replaceWith(iframe);
+});
+</script>""").strip('\n')
+
+# 分段載入: 依序把 .timeline-chunk 換成預先生成的片段 (接近畫面時載入)；
+# 點擊子導航列、或網址帶有 #段落 時，先載入到該段落所在的片段再捲動過去
+CHUNK_LOADER_SCRIPT = textwrap.dedent("""
+<script>
+(function() {
+    const chunks = Array.from(document.querySelectorAll('.timeline-chunk'));
+    let loading = null;
+    const observer = new IntersectionObserver(function(entries) {
+        if (entries.some(entry => entry.isIntersecting)) loadNext();
+    }, { rootMargin: '1500px 0px' });   // 距離畫面 1500px 時就開始載入下一段
+
+    function loadNext() {
+        if (loading) return loading;
+        const chunk = chunks[0];
+        if (!chunk || chunk.classList.contains('failed')) return Promise.resolve(false);
+        loading = fetch(chunk.dataset.src)
+            .then(function(response) {
+                if (!response.ok) throw new Error(response.status);
+                return response.text();
+            })
+            .then(function(html) {
+                chunks.shift();
+                chunk.insertAdjacentHTML('beforebegin', html);
+                chunk.remove();
+                observer.disconnect();
+                if (chunks.length) observer.observe(chunks[0]);
+                document.dispatchEvent(new Event('timeline-chunk-loaded'));
+                return true;
+            })
+            .catch(function() {
+                observer.disconnect();
+                chunk.classList.add('failed');
+                chunk.textContent = '後續內容載入失敗，請重新整理頁面。';
+                return false;
+            })
+            .finally(function() { loading = null; });
+        return loading;
+    }
+
+    function loadUntil(id) {
+        if (document.getElementById(id)) return Promise.resolve(true);
+        if (!chunks.some(chunk => chunk.dataset.sections.split(' ').includes(id))) return Promise.resolve(false);
+        return loadNext().then(ok => ok ? loadUntil(id) : false);
+    }
+
+    function jumpTo(id) {
+        loadUntil(id).then(function(found) {
+            if (!found) return;
+            if (location.hash === '#' + id) document.getElementById(id).scrollIntoView();
+            else location.hash = id;
+        });
+    }
+
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('a[href^="#"]');
+        if (!link) return;
+        const id = decodeURIComponent(link.getAttribute('href').slice(1));
+        if (!id || document.getElementById(id)) return;
+        e.preventDefault();
+        jumpTo(id);
+    });
 
-        # 2. p (Journal) - Updated Logic
-        if stripped == 'p':
-            in_p = True
-            p_buffer = []
-            continue
-        elif stripped == 'end p':
-            in_p = False
-            title, content = parse_p_block(p_buffer)
-            if title:
-                blocks.append({
-                    'type': 'journal',
-                    'title': title,
-                    'content': content
-                })
-            continue
-        
-        if in_p:
-            p_buffer.append(line) # 保留原始行內容 (含空白)
-            continue
+    if (location.hash) jumpTo(decodeURIComponent(location.hash.slice(1)));
+    if (chunks.length) observer.observe(chunks[0]);
+})();
+</script>""").strip('\n')
+
+render_timeline_chunk = '<div class="timeline-chunk" data-src="{src}" data-sections="{sections}"></div>'.format
+
+def render_youtube_media(filename, video, youtube_facade):
+    """ YouTube 影片: 直接嵌入 iframe，或預覽模式下的預覽圖 + 播放鍵 (shorts 保留 9:16 的空間) """
+    if not youtube_facade:
+        return render_youtube_iframe(video_id=video['id'])
+    poster = get_video_poster(filename, video)
+    attr = render_poster_attr(w=poster['width'], h=poster['height']) if poster['width'] else ''
+    return render_youtube_facade(video_id=video['id'], shorts=' yt-shorts' if video['shorts'] else '',
+                                 poster=poster['src'], attr=attr)
+
+def render_media_block(b, youtube_map, youtube_facade=False):
+    """ 單一照片/影片的 media-item 區塊 """
+    fname = b['filename']
+    caption = b['caption'] if b['caption'] else f"這是 {fname} 的圖說... "
+
+    if b['is_video']:
+        video = youtube_map.get(fname)
+        if video:
+            media_html = render_youtube_media(fname, video, youtube_facade)
+            caption += " (YouTube 影片)"
+        else:
+            media_html = render_missing_video(filename=fname)
+            caption += " (影片尚未連結)"
+    else:
+        media_html = render_img_tag(get_image_info(fname), render_media_img_attr, MEDIA_IMG_SIZES)
 
-        # 3. Media
-        if not stripped:
-            continue
+    return render_media_item(media=media_html, caption=caption, filename=fname)
 
-        # --- [修正] 支援檔名中有空格 ---
-        valid_exts = ['.jpg', '.jpeg', '.png', '.mp4', '.mov']
-        lower_line = stripped.lower()
-        
-        split_pos = -1
-        
-        # 策略 A: 找尋 "副檔名 + 空格" (代表後面有圖說)
-        # 我們要找"最早"出現的那個，以免圖說裡也有副檔名
-        min_idx = len(stripped) + 1
-        found_len = 0
-        
-        for ext in valid_exts:
-            search_str = ext + " "
-            idx = lower_line.find(search_str)
-            if idx != -1 and idx < min_idx:
-                min_idx = idx
-                found_len = len(ext)
-        
-        if min_idx != len(stripped) + 1:
-            split_pos = min_idx + found_len
-        else:
-            # 策略 B: 如果沒圖說，檢查是否直接以副檔名結尾
-            for ext in valid_exts:
-                if lower_line.endswith(ext):
-                    split_pos = len(stripped)
-                    break
-        
-        # 如果成功辨識出檔名
-        if split_pos != -1:
-            fname = stripped[:split_pos]
-            description = stripped[split_pos:].strip()
-            
-            is_video = fname.lower().endswith(('.mp4', '.mov'))
-            blocks.append({
-                'type': 'media',
-                'filename': fname,
-                'caption': description,
-                'is_video': is_video
-            })
-            media_count += 1
-            if not is_video and first_image is None:
-                first_image = fname
+def render_img_tag(info, render_attr, sizes):
+    """
+    <img>: 有尺寸就加上 width/height/aspect-ratio (避免版面跳動)，有其他寬度版本就加上 srcset
+    有佔位色就當作底色，圖片還沒下載完時版面先有顏色
+    有 WebP/AVIF 時外面再包一層 <picture>，原本的 JPEG <img> 作為退路
+    """
+    w, h = info['width'], info['height']
+    style = render_placeholder_style(color=info['placeholder']) if info.get('placeholder') else ''
+    if w and h:
+        img_attr = render_attr(w=w, h=h, style=style)
+    elif style:
+        img_attr = f' loading="lazy" style="{style}"'
+    else:
+        img_attr = ' loading="lazy"'
+    if info['srcset']:
+        img_html = render_responsive_image(src=info['src'], srcset=info['srcset'], sizes=sizes, attr=img_attr)
+    else:
+        img_html = render_image(src=info['src'], attr=img_attr)
 
-    return blocks, media_count, first_image
+    if not info['sources']:
+        return img_html
+    sources = "".join(render_picture_source(type=src['type'], srcset=src['srcset'], sizes=sizes) for src in info['sources'])
+    return render_picture(sources=sources, img=img_html)
+
+def render_card_image(filename):
+    """ 首頁卡片的封面圖 """
+    return render_img_tag(get_image_info(filename), render_card_img_attr, CARD_IMG_SIZES)
 
 # --- 頁面生成函式 ---
+# 頁面以 write(片段) 逐段寫入暫存檔，不在記憶體中組出整頁字串；
+# 頁首、頁尾的縮排與舊版 (整頁 f-string + textwrap.dedent) 的輸出完全相同
+
+# 本次建置的輸出異動 (平行建置時由子程序交回主程序合併)
+_output_report = {'written': [], 'unchanged': [], 'removed': []}
+
+def record_output(status, path):
+    _output_report[status].append(path)
+
+def pop_output_report():
+    report = {status: list(paths) for status, paths in _output_report.items()}
+    for paths in _output_report.values():
+        paths.clear()
+    return report
+
+def merge_output_report(report):
+    for status, paths in report.items():
+        _output_report[status].extend(paths)
 
-def create_date_html(date_str, blocks, youtube_map, main_site_title):
+@contextlib.contextmanager
+def open_page_writer(path, description=None):
+    """
+    逐段寫入頁面，回傳 write 函式
+    內容先寫到暫存檔，全部完成後才以 os.replace 取代目標檔 (生成途中出錯不會留下寫一半的頁面)；
+    若內容與現有檔案完全相同則保留原檔，不更動修改時間，部署時就不會重新上傳
+    """
+    tmp_path = path + '.tmp'
+    f = open(tmp_path, 'w', encoding='utf-8')
+    try:
+        yield f.write
+    except BaseException:
+        f.close()
+        os.remove(tmp_path)
+        raise
+    f.close()
+
+    if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+        record_output('unchanged', path)
+        print(f"內容相同: {path} (保留原檔)")
+    else:
+        os.replace(tmp_path, path)
+        record_output('written', path)
+        print(f"已生成: {description or path}")
+
+def write_page_start(write, title, navbar_html, sub_navbar_html=''):
+    """ <!DOCTYPE> 到 <main> 開頭 (之後的第一段內容接在同一行的縮排後面) """
+    write(
+        '<!DOCTYPE html>\n'
+        '    <html lang="zh-TW">\n'
+        '    <head>\n'
+        '        <meta charset="UTF-8">\n'
+        '        <meta name="viewport" content="width=device-width, initial-scale=1.0">\n'
+        f'        <title>{title}</title>\n'
+        '        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&display=swap" rel="stylesheet">\n'
+        f'        <link rel="stylesheet" href="{asset_url(CSS_FILE)}">\n'
+        '    </head>\n'
+        '    <body>\n'
+        f'    {navbar_html}\n'
+    )
+    # 沒有子導航列時保留空行
+    write(f'    {sub_navbar_html}\n' if sub_navbar_html else '\n')
+    write('    <main>\n    ')
+
+def write_page_end(write, extra_script='', chunked=False):
+    scripts = get_js_content(chunked) + (f'\n    {extra_script}' if extra_script else '')
+    write(f'\n    </main>\n    {scripts}\n    </body>\n    </html>')
+
+def split_timeline(blocks, chunk_size):
+    """
+    分段載入: 把日期頁的區塊切成數段，每段最多 chunk_size 個照片/影片 (chunk_size 為 0 時不分段)
+    段落標題與遊記跟著後面的內容放進下一段，不會單獨留在前一段的最後
+    """
+    if not chunk_size:
+        return [blocks]
+    chunks = [[]]
+    media_count = 0
+    for b in blocks:
+        if media_count == chunk_size:
+            chunks.append([])
+            media_count = 0
+        chunks[-1].append(b)
+        if b['type'] == 'media':
+            media_count += 1
+    return chunks
+
+def write_timeline_blocks(write, blocks, youtube_map, youtube_facade=False):
+    """ 時間軸中的段落標題、遊記與照片/影片 (日期頁與分段載入的片段共用) """
+    for b in blocks:
+        if b['type'] == 'section':
+            write('\n\n')
+            write(render_section_header(id=b['id'], title=b['title']))
+            write('\n')
+        elif b['type'] == 'journal':
+            # 新的 Journal 結構：標題 + 內容
+            write('\n\n')
+            write(render_journal_block(title=b['title'], content=b['content']))
+        elif b['type'] == 'media':
+            write('\n\n')
+            write(render_media_block(b, youtube_map, youtube_facade))
+
+def create_date_html(date_str, blocks, youtube_map, main_site_title, youtube_facade=False, chunk_size=0):
     display_date = get_date_display(date_str)
-    day_idx = ALL_DATES.index(date_str) + 1
+    idx = DATE_INDEX[date_str]
+    day_idx = idx + 1
     page_title = f"{main_site_title} Day {day_idx}" # Head Title
     
     # 1. Sub-Navbar
@@ -370,99 +1055,49 @@ def create_date_html(date_str, blocks, youtube_map, main_site_title):
     if sub_nav_links:
         sub_navbar_html = f'<nav class="sub-nav"><div class="sub-nav-inner">{"".join(sub_nav_links)}</div></nav>'
 
-    # 2. Content
-    content_lines = []
-    content_lines.append(f'<div class="page-header"><h1>Day {day_idx}</h1><p>{display_date}</p></div>')
-    content_lines.append('<div class="timeline-container">')
-
-    for b in blocks:
-        if b['type'] == 'section':
-            content_lines.append(f'\n    <div id="{b["id"]}" class="section-anchor"></div>')
-            content_lines.append(f'    <div class="section-header"><span class="section-dot"></span><h2>{b["title"]}</h2></div>\n')
+    output = f"{date_str}.html"
+    with open_page_writer(output, f"{output} (Title: {page_title})") as write:
+        write_page_start(write, page_title, get_navbar_html(date_str), sub_navbar_html)
+
+        # 2. Content
+        write(f'<div class="page-header"><h1>Day {day_idx}</h1><p>{display_date}</p></div>')
+        write('\n<div class="timeline-container">')
+
+        chunks = split_timeline(blocks, chunk_size)
+        write_timeline_blocks(write, chunks[0], youtube_map, youtube_facade)
+
+        # 其餘各段寫成片段檔，頁面中只留下載入位置 (並記下該段的段落，子導航列跳轉時才知道要載入到哪裡)
+        fragments = []
+        if len(chunks) > 1:
+            os.makedirs(FRAGMENT_FOLDER, exist_ok=True)
+        for n, chunk in enumerate(chunks[1:], 1):
+            path = fragment_path(date_str, n)
+            fragments.append(path)
+            with open_page_writer(path) as write_fragment:
+                write_timeline_blocks(write_fragment, chunk, youtube_map, youtube_facade)
+            sections = " ".join(b['id'] for b in chunk if b['type'] == 'section')
+            write('\n\n')
+            write(render_timeline_chunk(src=path, sections=sections))
+
+        write('\n</div>')
+
+        # Pagination
+        prev_link = f'{ALL_DATES[idx-1]}.html' if idx > 0 else 'index.html'
+        prev_text = '← 前一天' if idx > 0 else '← 回首頁'
+        next_link = f'{ALL_DATES[idx+1]}.html' if idx < len(ALL_DATES) - 1 else 'summary.html'
+        next_text = '下一天 →' if idx < len(ALL_DATES) - 1 else '看總結 →'
         
-        elif b['type'] == 'journal':
-            # 新的 Journal 結構：標題 + 內容
-            content_lines.append(textwrap.dedent(f"""
-            <div class="journal-block">
-                <h3>{b['title']}</h3>
-                <p>{b['content']}</p>
-            </div>"""))
-        
-        elif b['type'] == 'media':
-            fname = b['filename']
-            caption_text = b['caption']
-            caption_extra = ""
-            media_html = ""
-
-            if b['is_video']:
-                yt_id = youtube_map.get(fname)
-                if yt_id:
-                    media_html = (
-                        f'<iframe width="100%" height="100%" '
-                        f'src="https://www.youtube.com/embed/{yt_id}?rel=0" '
-                        f'title="YouTube video player" frameborder="0" '
-                        f'allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" '
-                        f'referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>'
-                    )
-                    caption_extra = "(YouTube 影片)"
-                else:
-                    media_html = f'<div style="padding:40px;background:#eee;text-align:center;color:#666;">影片 {fname} 尚未設定 YouTube ID</div>'
-                    caption_extra = "(影片尚未連結)"
-            else:
-                img_attr = ' loading="lazy"'
-                w, h = get_image_dimensions(fname)
-                if w and h:
-                    img_attr = f' width="{w}" height="{h}" loading="lazy" style="aspect-ratio:{w}/{h};"'
-                media_html = f'<img src="{OUTPUT_HTML_IMG_PATH}{fname}"{img_attr}>'
-
-            final_caption = caption_text if caption_text else f"這是 {fname} 的圖說... "
-            if caption_extra:
-                final_caption += f" {caption_extra}"
-
-            content_lines.append(textwrap.dedent(f"""
-            <article class="media-item">
-                <div class="media-content">{media_html}</div>
-                <div class="caption">
-                    <div>{final_caption}</div>
-                    <div class="filename-ref">{fname}</div>
-                </div>
-            </article>"""))
-
-    content_lines.append('</div>')
-
-    # Pagination
-    idx = ALL_DATES.index(date_str)
-    prev_link = f'{ALL_DATES[idx-1]}.html' if idx > 0 else 'index.html'
-    prev_text = '← 前一天' if idx > 0 else '← 回首頁'
-    next_link = f'{ALL_DATES[idx+1]}.html' if idx < len(ALL_DATES) - 1 else 'summary.html'
-    next_text = '下一天 →' if idx < len(ALL_DATES) - 1 else '看總結 →'
-    
-    content_lines.append(f'\n<div class="pagination"><a href="{prev_link}" class="btn">{prev_text}</a><a href="{next_link}" class="btn">{next_text}</a></div>')
-
-    full_html = textwrap.dedent(f"""
-    <!DOCTYPE html>
-    <html lang="zh-TW">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{page_title}</title>
-        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="{CSS_FILE}">
-    </head>
-    <body>
-    {get_navbar_html(date_str)}
-    {sub_navbar_html}
-    <main>
-    {chr(10).join(content_lines)}
-    </main>
-    {get_js_content()}
-    </body>
-    </html>
-    """).strip()
+        write(f'\n\n<div class="pagination"><a href="{prev_link}" class="btn">{prev_text}</a><a href="{next_link}" class="btn">{next_text}</a></div>')
+
+        has_videos = any(b['type'] == 'media' and b['is_video'] and b['filename'] in youtube_map for b in blocks)
+        scripts = []
+        if youtube_facade and has_videos:
+            scripts.append(YOUTUBE_FACADE_SCRIPT)
+        if fragments:
+            scripts.append(CHUNK_LOADER_SCRIPT)
+        write_page_end(write, '\n    '.join(scripts), chunked=bool(fragments))
 
-    with open(f"{date_str}.html", 'w', encoding='utf-8') as f:
-        f.write(full_html)
-    print(f"已生成: {date_str}.html (Title: {page_title})")
+    remove_stale_fragments(date_str, fragments)
 
 
 def create_index_html(day_infos, main_title, subtitle, journal_blocks, cover_map):
@@ -470,156 +1105,302 @@ def create_index_html(day_infos, main_title, subtitle, journal_blocks, cover_map
     生成 index.html
     day_infos: list of dict {'date': '...', 'count': 123, 'cover': '...'}
     """
-    content_lines = []
-    content_lines.append(f'<div class="page-header"><h1>{main_title}</h1><p>{subtitle}</p></div>')
-    content_lines.append('<div class="home-grid">')
+    with open_page_writer("index.html", f"index.html (Title: {main_title})") as write:
+        write_page_start(write, main_title, get_navbar_html('home'))
+        write(f'<div class="page-header"><h1>{main_title}</h1><p>{subtitle}</p></div>')
+        write('\n<div class="home-grid">')
 
-    for info in day_infos:
-        date_str = info['date']
-        count = info['count']
-        
-        # 決定封面圖：優先查 index.txt 的設定，沒有則用當天第一張
-        cover_img = cover_map.get(date_str, info['cover'])
-        
-        img_html = '<div class="placeholder-gradient"></div>'
-        if cover_img:
-            img_attr = ' loading="lazy"'
-            w, h = get_image_dimensions(cover_img)
-            if w and h:
-                img_attr = f' width="{w}" height="{h}" style="aspect-ratio:{w}/{h};" loading="lazy"'
-            img_html = f'<img src="{OUTPUT_HTML_IMG_PATH}{cover_img}"{img_attr}>'
+        for info in day_infos:
+            date_str = info['date']
+            
+            # 決定封面圖：優先查 index.txt 的設定，沒有則用當天第一張
+            cover_img = cover_map.get(date_str, info['cover'])
+            img_html = render_card_image(cover_img) if cover_img else '<div class="placeholder-gradient"></div>'
+            
+            write('\n\n')
+            write(render_day_card(
+                href=f"{date_str}.html",
+                img=img_html,
+                title=f"Day {DATE_INDEX[date_str]+1}",
+                meta=f"{get_formatted_date(date_str)} • {info['count']} 個項目",
+            ))
+
+        # 總結卡片 (也檢查是否有自訂封面)
+        summary_cover = cover_map.get('summary', '')
+        summary_img_html = '<div style="width:100%;height:100%;background:#4a5568;"></div>' # 預設灰底
+        if summary_cover:
+            summary_img_html = render_card_image(summary_cover)
+
+        write('\n')
+        write(render_day_card(href="summary.html", img=summary_img_html, title="旅程總結", meta="心得、後記與精選回憶"))
         
-        card_html = textwrap.dedent(f"""
-        <a href="{date_str}.html" class="day-card">
-            <div class="card-img-wrap">{img_html}</div>
-            <div class="card-content"><h3>Day {ALL_DATES.index(date_str)+1}</h3><p>{get_formatted_date(date_str)} • {count} 個項目</p></div>
-        </a>""")
-        content_lines.append(card_html)
-
-    # 總結卡片 (也檢查是否有自訂封面)
-    summary_cover = cover_map.get('summary', '')
-    summary_img_html = '<div style="width:100%;height:100%;background:#4a5568;"></div>' # 預設灰底
-    if summary_cover:
-        w, h = get_image_dimensions(summary_cover)
-        img_attr = ' loading="lazy"'
-        if w and h:
-            img_attr = f' width="{w}" height="{h}" style="aspect-ratio:{w}/{h};" loading="lazy"'
-        summary_img_html = f'<img src="{OUTPUT_HTML_IMG_PATH}{summary_cover}"{img_attr}>'
-
-    content_lines.append(textwrap.dedent(f"""
-    <a href="summary.html" class="day-card">
-        <div class="card-img-wrap">{summary_img_html}</div>
-        <div class="card-content"><h3>旅程總結</h3><p>心得、後記與精選回憶</p></div>
-    </a>
-    """).strip())
-    
-    content_lines.append('</div>')
+        write('\n</div>')
 
-    # 加入 index.txt 裡的 Journal Blocks
-    if journal_blocks:
-        content_lines.append('\n')
-        for b in journal_blocks:
-            content_lines.append(textwrap.dedent(f"""
-            <div class="journal-block">
-                <h3>{b['title']}</h3>
-                <p>{b['content']}</p>
-            </div>"""))
-
-    full_html = textwrap.dedent(f"""
-    <!DOCTYPE html>
-    <html lang="zh-TW">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{main_title}</title>
-        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="{CSS_FILE}">
-    </head>
-    <body>
-    {get_navbar_html('home')}
-
-    <main>
-    {chr(10).join(content_lines)}
-    </main>
-    {get_js_content()}
-    </body>
-    </html>
-    """).strip()
+        # 加入 index.txt 裡的 Journal Blocks
+        if journal_blocks:
+            write('\n\n')
+            for b in journal_blocks:
+                write('\n\n')
+                write(render_journal_block(title=b['title'], content=b['content']))
 
-    with open("index.html", 'w', encoding='utf-8') as f:
-        f.write(full_html)
-    print(f"已生成: index.html (Title: {main_title})")
+        write_page_end(write)
 
 def create_summary_html(main_site_title, page_title, subtitle, journal_blocks):
     last_date_link = f"{ALL_DATES[-1]}.html" if ALL_DATES else "index.html"
     
-    content_lines = []
-    content_lines.append(f'<div class="page-header"><h1>{page_title}</h1><p>{subtitle}</p></div>')
-    
-    for b in journal_blocks:
-        content_lines.append(textwrap.dedent(f"""
-        <div class="journal-block">
-            <h3>{b['title']}</h3>
-            <p>{b['content']}</p>
-        </div>"""))
+    with open_page_writer("summary.html") as write:
+        write_page_start(write, f"{main_site_title} summary", get_navbar_html('summary'))
+        write(f'<div class="page-header"><h1>{page_title}</h1><p>{subtitle}</p></div>')
         
-    content_lines.append(f'<div class="pagination"><a href="{last_date_link}" class="btn">← 回到最後一天</a><a href="index.html" class="btn">回首頁 🏠</a></div>')
-
-    full_html = textwrap.dedent(f"""
-    <!DOCTYPE html>
-    <html lang="zh-TW">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{main_site_title} summary</title>
-        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+TC:wght@300;400;500;700&display=swap" rel="stylesheet">
-        <link rel="stylesheet" href="{CSS_FILE}">
-    </head>
-    <body>
-    {get_navbar_html('summary')}
-
-    <main>
-    {chr(10).join(content_lines)}
-    </main>
-    {get_js_content()}
-    </body>
-    </html>
-    """).strip()
+        for b in journal_blocks:
+            write('\n\n')
+            write(render_journal_block(title=b['title'], content=b['content']))
+            
+        write(f'\n<div class="pagination"><a href="{last_date_link}" class="btn">← 回到最後一天</a><a href="index.html" class="btn">回首頁 🏠</a></div>')
+
+        write_page_end(write)
+
+def build_date_page(date_str, youtube_map, site_title, manifest, force, youtube_facade=False, chunk_size=0):
+    """
+    解析並生成單日頁面 (可在子程序中執行)
+    回傳: {'info': 給 index 用的統計資訊, 'output': 檔名, 'inputs': 建置紀錄}
+    """
+    blocks, count, first_img = parse_date_txt(date_str)
 
-    with open("summary.html", 'w', encoding='utf-8') as f:
-        f.write(full_html)
-    print("已生成: summary.html")
+    output = f"{date_str}.html"
+    inputs = get_date_page_inputs(date_str, blocks, youtube_map, site_title, youtube_facade, chunk_size)
+    if needs_rebuild(output, inputs, manifest, force):
+        create_date_html(date_str, blocks, youtube_map, site_title, youtube_facade, chunk_size)
 
-def main():
+    return {
+        'info': {
+            'date': date_str,
+            'count': count,
+            'cover': first_img # 這是備案，如果 index.txt 沒指定封面就會用這個
+        },
+        'output': output,
+        'inputs': inputs,
+    }
+
+def build_date_page_captured(args):
+    """ 子程序用: 先收集 print 的輸出，交回主程序依日期順序印出 """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = build_date_page(*args)
+    result['log'] = log.getvalue()
+    result['dimensions'] = pop_dimension_updates()
+    result['report'] = pop_output_report()
+    return result
+
+def build_date_pages(jobs, youtube_map, site_title, manifest, force, youtube_facade=False, chunk_size=0):
+    """ 依 ALL_DATES 順序產生每一天的建置結果；jobs > 1 時以多個程序平行生成 """
+    tasks = [(date_str, youtube_map, site_title, manifest, force, youtube_facade, chunk_size) for date_str in ALL_DATES]
+    if jobs == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield build_date_page(*task)
+        return
+
+    # --watch 時 HTTP 伺服器在另一個執行緒中執行: 不以 fork 啟動子程序，避免複製到該執行緒持有的鎖
+    # 子程序因此不會繼承 set_dates() 的結果，所以由 initializer 重新設定
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    with ProcessPoolExecutor(max_workers=jobs or None, mp_context=context,
+                             initializer=set_dates, initargs=(ALL_DATES,)) as pool:
+        # map 依提交順序回傳結果，輸出的訊息順序與循序建置相同
+        for result in pool.map(build_date_page_captured, tasks):
+            print(result['log'], end='')
+            merge_dimension_updates(result['dimensions'])
+            merge_output_report(result['report'])
+            yield result
+
+def build_site(jobs=1, force=False, youtube_facade=False, chunk_size=0):
     print("--- 開始建置所有網頁 ---")
+
+    # 預覽模式下照片可能被重新壓縮、也可能新增日期，每次建置都重新比對
+    _dimension_memo.clear()
+    reset_compress_manifest()
+    set_dates(discover_dates())
     
-    # 1. 讀取設定檔 (Index & Summary)
+    # 1. 讀取設定檔 (Index & Summary) 與上次的建置紀錄
     site_title, site_subtitle, cover_map, index_journals = parse_index_txt()
     summary_title, summary_subtitle, summary_journals = parse_summary_txt()
     youtube_map = load_youtube_ids(YOUTUBE_ID_FILE)
+    manifest = load_build_manifest()
+    new_manifest = {}
     
     day_infos = [] # 儲存每一天的統計資訊給 index 用
 
-    # 2. 生成每一天的內頁
-    for date_str in ALL_DATES:
-        blocks, count, first_img = parse_date_txt(date_str)
-        
-        # 產生該日期的 HTML
-        create_date_html(date_str, blocks, youtube_map, site_title)
-        
-        day_infos.append({
-            'date': date_str,
-            'count': count,
-            'cover': first_img # 這是備案，如果 index.txt 沒指定封面就會用這個
-        })
+    # 2. 生成每一天的內頁 (只重新生成輸入有變更的頁面)
+    for result in build_date_pages(jobs, youtube_map, site_title, manifest, force, youtube_facade, chunk_size):
+        new_manifest[result['output']] = result['inputs']
+        day_infos.append(result['info'])
 
-    # 3. 生成 index.html
-    create_index_html(day_infos, site_title, site_subtitle, index_journals, cover_map)
+    # 3. 生成 index.html (需等所有內頁的統計資訊都到齊)
+    inputs = get_index_page_inputs(day_infos, cover_map)
+    if needs_rebuild("index.html", inputs, manifest, force):
+        create_index_html(day_infos, site_title, site_subtitle, index_journals, cover_map)
+    new_manifest["index.html"] = inputs
     
     # 4. 生成 summary.html
-    create_summary_html(site_title, summary_title, summary_subtitle, summary_journals)
+    inputs = get_summary_page_inputs(site_title)
+    if needs_rebuild("summary.html", inputs, manifest, force):
+        create_summary_html(site_title, summary_title, summary_subtitle, summary_journals)
+    new_manifest["summary.html"] = inputs
+
+    # 5. 移除不再生成的頁面
+    remove_stale_outputs(manifest, new_manifest)
+
+    # 6. 儲存圖片尺寸快取與建置紀錄，下次建置就不必再開啟圖片或重新生成未變更的頁面
+    save_dimension_index()
+    save_build_manifest(new_manifest)
+
+    report = pop_output_report()
+    build_report.save_build_report('generate_html', report)
+    print(f"輸出: 寫入 {len(report['written'])} 個、未變更 {len(report['unchanged'])} 個、移除 {len(report['removed'])} 個 (詳見 {build_report.BUILD_REPORT_FILE})")
+
+    stale_assets = count_stale_assets()
+    if stale_assets:
+        print(f"提示: {stale_assets} 個靜態檔在建立副本後有變更，暫時使用原本的網址；請重新執行 fingerprint_assets.py。")
     
     print("--- 全部完成 ---")
 
+# --- 預覽模式 (Watch & Live Reload) ---
+# 瀏覽器透過 Server-Sent Events 連到 LIVE_RELOAD_PATH，
+# 每次重新建置完成後 _reload_version 加一，所有開著的分頁就會重新整理
+
+_reload_version = 0
+_reload_condition = threading.Condition()
+
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = function() {{ location.reload(); }};</script>'
+).encode('utf-8')
+
+def notify_reload():
+    global _reload_version
+    with _reload_condition:
+        _reload_version += 1
+        _reload_condition.notify_all()
+
+class PreviewRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """ 一般的靜態檔案伺服器，另外在 HTML 中注入重新整理用的 script (不會寫回檔案) """
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == LIVE_RELOAD_PATH:
+            self.send_reload_events()
+        elif path == '/' or path.endswith('.html'):
+            self.send_html(path if path != '/' else '/index.html')
+        else:
+            super().do_GET()
+
+    def send_html(self, path):
+        local_path = self.translate_path(path)
+        if not os.path.isfile(local_path):
+            self.send_error(404)
+            return
+        with open(local_path, 'rb') as f:
+            body = f.read()
+        head, sep, tail = body.rpartition(b'</body>')
+        if sep:
+            body = head + LIVE_RELOAD_SCRIPT + sep + tail
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_reload_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        with _reload_condition:
+            seen = _reload_version
+        try:
+            while True:
+                with _reload_condition:
+                    _reload_condition.wait_for(lambda: _reload_version != seen, timeout=15)
+                    changed = _reload_version != seen
+                    seen = _reload_version
+                # 沒有變更時送註解當作心跳，順便偵測分頁是否已關閉
+                self.wfile.write(b'data: reload\n\n' if changed else b': ping\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass # 不印出每個請求，避免洗掉建置訊息
+
+def snapshot_watched_files():
+    """ 監看範圍: 所有 txt (含 youtube_id.txt)、style.css、壓縮後的照片與其 manifest、asset_manifest.json；回傳 {路徑: (大小, 修改時間)} """
+    paths = [f for f in os.listdir('.') if f.endswith('.txt')]
+    paths.append(CSS_FILE)
+    paths.append(COMPRESS_MANIFEST_FILE)
+    paths.append(ASSET_MANIFEST_FILE)
+    for root, _, files in os.walk(LOCAL_IMG_FOLDER):
+        paths.extend(os.path.join(root, f) for f in files)
+
+    snapshot = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+def watch(jobs, port, youtube_facade=False, chunk_size=0):
+    """ 建置一次後啟動預覽伺服器，接著輪詢檔案變更，有變更就增量建置並通知瀏覽器重新整理 """
+    build_site(jobs, youtube_facade=youtube_facade, chunk_size=chunk_size)
+
+    handler = functools.partial(PreviewRequestHandler, directory=os.getcwd())
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"預覽網址: http://127.0.0.1:{port}/ (按 Ctrl+C 結束)")
+
+    snapshot = snapshot_watched_files()
+    try:
+        while True:
+            time.sleep(WATCH_INTERVAL)
+            current = snapshot_watched_files()
+            if current == snapshot:
+                continue
+            changed = sorted(p for p in current.keys() | snapshot.keys() if current.get(p) != snapshot.get(p))
+            snapshot = current
+            print(f"\n偵測到變更: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+            try:
+                build_site(jobs, youtube_facade=youtube_facade, chunk_size=chunk_size)
+            except Exception as e:
+                # 編輯到一半的檔案可能暫時無法解析，保持監看等下一次存檔
+                print(f"建置失敗: {e}")
+                continue
+            notify_reload()
+    except KeyboardInterrupt:
+        print("\n結束預覽模式。")
+    finally:
+        server.shutdown()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成旅遊網站的所有 HTML 頁面")
+    parser.add_argument('--force', action='store_true', help="忽略建置紀錄，重新生成所有頁面")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="平行生成內頁的程序數 (預設 1 = 循序；0 = 依 CPU 核心數)")
+    parser.add_argument('--watch', action='store_true',
+                        help="預覽模式: 監看檔案變更並自動重新建置、重新整理瀏覽器")
+    parser.add_argument('--port', type=int, default=PREVIEW_PORT, help="預覽伺服器的埠號")
+    parser.add_argument('--youtube-facade', action='store_true',
+                        help="YouTube 影片先顯示預覽圖與播放鍵，點擊後才載入播放器")
+    parser.add_argument('--chunk-size', type=int, default=0,
+                        help=f"分段載入: 日期頁只直接輸出前 N 個照片/影片，其餘每 N 個預先生成一個片段 ({FRAGMENT_FOLDER})，"
+                             "捲動到附近時才載入 (預設 0 = 不分段；片段以 fetch 載入，需透過伺服器瀏覽，例如 --watch)")
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        watch(args.jobs, args.port, args.youtube_facade, args.chunk_size)
+    else:
+        build_site(args.jobs, args.force, args.youtube_facade, args.chunk_size)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
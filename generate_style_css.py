@@ -1,5 +1,7 @@
 import os
 
+import build_report
+
 CSS_FILE = 'style.css'
 
 def main():
@@ -91,6 +93,7 @@ main { width: 100%; max-width: 720px; margin: 0 auto; padding: 40px 20px 100px 2
 }
 .day-card:hover { transform: translateY(-6px); box-shadow: 0 10px 15px rgba(0,0,0,0.08); }
 .card-img-wrap { height: 180px; width: 100%; background: #e2e8f0; position: relative; overflow: hidden; }
+.card-img-wrap picture { display: block; width: 100%; height: 100%; }
 .card-img-wrap img { width: 100%; height: 100%; object-fit: cover; transition: transform 0.5s ease; }
 .day-card:hover .card-img-wrap img { transform: scale(1.05); }
 .card-content { padding: 20px; }
@@ -110,8 +113,25 @@ main { width: 100%; max-width: 720px; margin: 0 auto; padding: 40px 20px 100px 2
 /* Media Content (CSS Aspect Ratio fallback) */
 .media-content { width: 100%; border-radius: 8px; overflow: hidden; background: #edf2f7; }
 /* 這裡重要：確保圖片自適應但有基本樣式 */
-img, iframe { width: 100%; height: auto; display: block; }
+img, iframe, picture { width: 100%; height: auto; display: block; }
 iframe { aspect-ratio: 16 / 9; border: none; } 
+/* YouTube 預覽圖 (--youtube-facade)：點擊後才換成 iframe，shorts 為直式 9:16 */
+.yt-facade { position: relative; display: block; aspect-ratio: 16 / 9; background: #000; cursor: pointer; }
+.yt-facade img { height: 100%; object-fit: cover; }
+.yt-shorts { aspect-ratio: 9 / 16; width: min(100%, 45vh); margin: 0 auto; }
+.yt-play {
+    position: absolute; top: 50%; left: 50%; width: 68px; height: 48px; margin: -24px 0 0 -34px;
+    background: rgba(33, 33, 33, 0.8); border-radius: 12px; transition: background 0.2s;
+}
+.yt-play::before {
+    content: ''; position: absolute; top: 50%; left: 50%; margin: -10px 0 0 -7px;
+    border-style: solid; border-width: 10px 0 10px 18px; border-color: transparent transparent transparent #fff;
+}
+.yt-facade:hover .yt-play, .yt-facade:focus .yt-play { background: #f00; }
+
+/* 分段載入: 還沒載入的片段先佔一些高度，載入失敗時顯示提示 */
+.timeline-chunk { min-height: 50vh; }
+.timeline-chunk.failed { min-height: 0; padding: 20px; text-align: center; color: var(--text-light); }
 
 .caption { padding: 15px 5px 5px 5px; font-size: 1rem; color: #4a5568; }
 .filename-ref { font-size: 0.75rem; color: #a0aec0; margin-top: 6px; font-family: monospace; }
@@ -128,9 +148,23 @@ iframe { aspect-ratio: 16 / 9; border: none; }
 @keyframes fadeIn { from { opacity: 0; transform: translateY(20px); } to { opacity: 1; transform: translateY(0); } }
 @media (max-width: 600px) { main { padding: 30px 15px; } .timeline-container::before { left: 0; } .media-item::before { left: -21px; } .journal-block { padding: 20px; margin-left: 0; } }
 """
-    with open(CSS_FILE, 'w', encoding='utf-8') as f:
-        f.write(css_content)
-    print(f"已生成: {CSS_FILE}")
+    report = {'written': [], 'unchanged': [], 'removed': []}
+
+    # 內容相同就不覆寫，保留原檔的修改時間，部署時才不會重新上傳
+    existing = None
+    if os.path.exists(CSS_FILE):
+        with open(CSS_FILE, 'r', encoding='utf-8', newline='') as f:
+            existing = f.read()
+    if existing == css_content.replace('\n', os.linesep):
+        report['unchanged'].append(CSS_FILE)
+        print(f"內容相同: {CSS_FILE} (保留原檔)")
+    else:
+        with open(CSS_FILE, 'w', encoding='utf-8') as f:
+            f.write(css_content)
+        report['written'].append(CSS_FILE)
+        print(f"已生成: {CSS_FILE}")
+
+    build_report.save_build_report('generate_style_css', report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,18 +2,14 @@ import os
 
 MEDIA_FOLDER = 'media'
 YOUTUBE_ID_FILENAME = 'youtube_id.txt'
+VIDEO_EXTS = ('.mp4', '.mov')
 
-def main():
-    """
-    從檔案列表中篩選出 .mp4，並生成 youtube_id_draft.txt
-    格式：檔名 (空格)
-    特色：不同日期之間會空一行
-    """
-    # 1. 篩選影片檔
-    video_files = [f for f in os.listdir(MEDIA_FOLDER) if f.lower().endswith('.mp4')]
+def select_videos(filenames):
+    """ 從檔名 (或 files.txt 中的相對路徑) 中篩選出影片檔並排序 """
+    return sorted(f for f in filenames if f.lower().endswith(VIDEO_EXTS))
 
-    video_files.sort()
-    
+def write_youtube_draft(video_files):
+    """ 寫出影片清單草稿 (會覆寫既有的 youtube_id.txt；run_pipeline 只在它不存在時執行) """
     if not video_files:
         print("沒有找到任何影片檔，略過生成 YouTube 草稿。")
         return
@@ -25,8 +21,8 @@ def main():
         
         for vid in video_files:
             # 假設檔名格式為 YYYYMMDD_...
-            # 取出前 8 碼作為日期
-            current_date = vid[:8]
+            # 取出前 8 碼作為日期 (在子資料夾中時取檔名的部分)
+            current_date = os.path.basename(vid)[:8]
             
             # 如果日期改變了 (且不是第一筆)，就插入空行
             if previous_date and current_date != previous_date:
@@ -41,6 +37,14 @@ def main():
     print("您可以打開它，直接在檔名後面貼上 YouTube 連結。")
     print("--- 任務完成 ---")
 
+def main():
+    """
+    從檔案列表中篩選出影片檔，並生成 youtube_id_draft.txt
+    格式：檔名 (空格)
+    特色：不同日期之間會空一行
+    """
+    # 1. 篩選影片檔
+    write_youtube_draft(select_videos(os.listdir(MEDIA_FOLDER)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
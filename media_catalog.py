@@ -0,0 +1,176 @@
+import os
+import sqlite3
+import argparse
+import datetime
+from collections import Counter, defaultdict
+
+import filename_timestamps
+
+# --- 設定 ---
+MEDIA_FOLDER = 'media/'                     # 原始照片/影片 (含子資料夾)
+CATALOG_FILE = '.media_catalog.sqlite'      # 媒體目錄: 每個檔案的拍攝時間、方向、尺寸、大小與修改時間
+MEDIA_EXTS = ('.jpg', '.jpeg', '.png', '.mp4', '.mov')
+VIDEO_EXTS = ('.mp4', '.mov')
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'           # 資料庫中的拍攝時間 (當地時間，字串排序即時間排序)
+
+# EXIF 標籤
+EXIF_IFD = 0x8769
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_DATETIME = 306
+EXIF_ORIENTATION = 274
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,          -- 相對於 media/ 的路徑 (以 / 分隔，與 files.txt 相同)
+    bytes INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    kind TEXT NOT NULL,             -- 'image' / 'video'
+    capture_time TEXT,              -- 拍攝時間 (TIME_FORMAT)
+    time_source TEXT,               -- 'exif' / 'filename' / 'mtime'
+    orientation INTEGER,            -- EXIF Orientation (1-8)，沒有則為 NULL
+    width INTEGER,                  -- 像素尺寸 (未套用旋轉)，影片為 NULL
+    height INTEGER
+);
+CREATE INDEX IF NOT EXISTS media_capture_time ON media (capture_time, path);
+"""
+
+def connect(catalog=CATALOG_FILE):
+    conn = sqlite3.connect(catalog)
+    conn.executescript(SCHEMA)
+    return conn
+
+def filename_capture_time(filename):
+    """ 從檔名推測拍攝時間 (規則見 filename_timestamps)；推測不出來回傳 None """
+    parsed = filename_timestamps.filename_timestamp(filename)
+    if not parsed:
+        return None
+    return datetime.datetime.strptime(parsed[0] + parsed[1], '%Y%m%d%H%M%S')
+
+def read_image_metadata(path):
+    """ 只讀檔頭: (EXIF 拍攝時間或 None, 方向或 None, 寬, 高) """
+    from PIL import Image
+
+    with Image.open(path) as img:
+        width, height = img.size
+        exif = img.getexif()
+    orientation = exif.get(EXIF_ORIENTATION)
+    raw = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+    captured = None
+    if isinstance(raw, str):
+        try:
+            captured = datetime.datetime.strptime(raw.strip('\x00 ')[:19], '%Y:%m:%d %H:%M:%S')
+        except ValueError:
+            captured = None
+    return captured, orientation, width, height
+
+def describe(path, rel_path, st):
+    """ 一個檔案在目錄中的資料列；拍攝時間依序採用 EXIF、檔名、修改時間 """
+    kind = 'video' if rel_path.lower().endswith(VIDEO_EXTS) else 'image'
+    captured = orientation = width = height = None
+    if kind == 'image':
+        try:
+            captured, orientation, width, height = read_image_metadata(path)
+        except Exception:
+            pass
+    source = 'exif'
+    if captured is None:
+        captured, source = filename_capture_time(rel_path), 'filename'
+    if captured is None:
+        captured, source = datetime.datetime.fromtimestamp(st.st_mtime), 'mtime'
+    return (rel_path, st.st_size, st.st_mtime_ns, kind, captured.strftime(TIME_FORMAT), source,
+            orientation, width, height)
+
+def walk_media(folder):
+    """ 遞迴列出 folder 中的媒體檔: (完整路徑, 相對路徑, stat) """
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.name.lower().endswith(MEDIA_EXTS):
+                rel_path = os.path.relpath(entry.path, folder).replace(os.sep, '/')
+                yield entry.path, rel_path, entry.stat()
+
+def scan(conn, folder=MEDIA_FOLDER):
+    """
+    增量更新目錄: 只重新讀取新增或大小/修改時間改變的檔案，並刪除已不存在的項目
+    回傳 {'added', 'updated', 'removed', 'unchanged'} 的數量
+    """
+    known = {path: (size, mtime) for path, size, mtime in conn.execute("SELECT path, bytes, mtime_ns FROM media")}
+    rows = []
+    counts = Counter()
+    seen = set()
+    for path, rel_path, st in walk_media(folder):
+        seen.add(rel_path)
+        previous = known.get(rel_path)
+        if previous == (st.st_size, st.st_mtime_ns):
+            counts['unchanged'] += 1
+            continue
+        counts['updated' if previous else 'added'] += 1
+        rows.append(describe(path, rel_path, st))
+
+    removed = [(path,) for path in known if path not in seen]
+    counts['removed'] = len(removed)
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("DELETE FROM media WHERE path = ?", removed)
+    return counts
+
+def load_capture_times(catalog=CATALOG_FILE):
+    """
+    {相對路徑: 拍攝時間 (datetime)}，給排序與依日期分組用
+    沒有建立過目錄時回傳空的 dict，呼叫端改用檔名推測
+    """
+    if not os.path.exists(catalog):
+        return {}
+    conn = sqlite3.connect(catalog)
+    try:
+        rows = conn.execute("SELECT path, capture_time FROM media WHERE capture_time IS NOT NULL").fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    return {path: datetime.datetime.strptime(t, TIME_FORMAT) for path, t in rows}
+
+def files_by_capture_date(conn):
+    """ {'YYYYMMDD': [相對路徑, ...]}，各日期內依拍攝時間排序 """
+    groups = defaultdict(list)
+    for path, captured in conn.execute("SELECT path, capture_time FROM media ORDER BY capture_time, path"):
+        groups[captured[:10].replace('-', '')].append(path)
+    return dict(groups)
+
+def main():
+    """
+    建立或增量更新 media/ 的媒體目錄 (.media_catalog.sqlite)
+    compress_photos、generate_date_template 與 build_site_* 會以目錄中的拍攝時間排序與分組，
+    不再只靠檔名推測 (截圖、修圖後匯出或改過名的檔案也能排對位置)
+    """
+    parser = argparse.ArgumentParser(description="建立或更新 media/ 的媒體目錄")
+    parser.add_argument('--rebuild', action='store_true', help="刪除既有目錄，重新讀取所有檔案")
+    args = parser.parse_args()
+
+    if not os.path.exists(MEDIA_FOLDER):
+        print(f"錯誤: 找不到 {MEDIA_FOLDER}")
+        return
+    if args.rebuild and os.path.exists(CATALOG_FILE):
+        os.remove(CATALOG_FILE)
+
+    print(f"--- 掃描 {MEDIA_FOLDER} ---")
+    conn = connect()
+    counts = scan(conn)
+    sources = dict(conn.execute("SELECT time_source, COUNT(*) FROM media GROUP BY time_source").fetchall())
+    days = len(files_by_capture_date(conn))
+    conn.close()
+
+    print(f"新增 {counts['added']} 個、更新 {counts['updated']} 個、移除 {counts['removed']} 個、未變更 {counts['unchanged']} 個")
+    print(f"拍攝時間來源: EXIF {sources.get('exif', 0)} 個、檔名 {sources.get('filename', 0)} 個、"
+          f"修改時間 {sources.get('mtime', 0)} 個；共 {days} 天")
+    print(f"目錄位於: {CATALOG_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import media_catalog
+import exclude_list
+import generate_files_txt
+import generate_date_template
+import generate_youtube_id_txt
+import compress_photos
+import generate_style_css
+import generate_html
+
+# --- 設定 ---
+PIPELINE_STATE_FILE = '.pipeline_state.json'   # 每個步驟上次成功執行時的輸入指紋
+
+# --- 各步驟的輸出收集 ---
+# 步驟在各自的執行緒中執行，print 的內容先收進該步驟的緩衝區，結束後再整段印出，不會互相穿插
+
+class StageOutput:
+    """ 取代 sys.stdout: 步驟執行緒中的輸出寫進該步驟的緩衝區，其他執行緒照常輸出 """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+# --- 輸入指紋 ---
+
+def stat_fingerprint(paths):
+    """ {路徑: [檔案大小, 修改時間]}，不存在的檔案為 None """
+    result = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            result[path] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            result[path] = None
+    return result
+
+def load_state():
+    if not os.path.exists(PIPELINE_STATE_FILE):
+        return {}
+    try:
+        with open(PIPELINE_STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state):
+    tmp_path = PIPELINE_STATE_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, PIPELINE_STATE_FILE)
+
+# --- 各步驟 ---
+# inputs(ctx) 回傳可 JSON 化的輸入 (通常是 stat_fingerprint)；outputs 為步驟產生的檔案
+# ctx['listing'] 是 files 步驟掃描 media/ 得到的檔名清單，後續步驟共用，不再重新讀取 files.txt
+
+def run_files(ctx):
+    generate_files_txt.write_files_txt(ctx['listing'])
+
+def run_catalog(ctx):
+    # 增量掃描: 只重新讀取新增或改過的檔案，後續步驟才會拿到新照片的拍攝時間
+    conn = media_catalog.connect()
+    try:
+        counts = media_catalog.scan(conn)
+    finally:
+        conn.close()
+    print(f"{media_catalog.CATALOG_FILE}: 新增 {counts['added']} 個、更新 {counts['updated']} 個、"
+          f"移除 {counts['removed']} 個、未變更 {counts['unchanged']} 個")
+
+def templates_inputs(ctx):
+    return stat_fingerprint([generate_date_template.INPUT_FILE, exclude_list.EXCLUDE_FILE,
+                             media_catalog.CATALOG_FILE, generate_date_template.__file__])
+
+def run_templates(ctx):
+    generate_date_template.write_all_templates(
+        ctx['listing'], exclude_list.load_exclude_list(),
+        media_catalog.load_capture_times())
+
+def run_youtube(ctx):
+    generate_youtube_id_txt.write_youtube_draft(generate_youtube_id_txt.select_videos(ctx['listing']))
+
+def compress_inputs(ctx):
+    images = [f for f in ctx['listing'] if not f.lower().endswith(generate_youtube_id_txt.VIDEO_EXTS)]
+    paths = [compress_photos.INPUT_FILE, exclude_list.EXCLUDE_FILE, media_catalog.CATALOG_FILE,
+             compress_photos.__file__]
+    paths += [os.path.join(compress_photos.SOURCE_MEDIA_FOLDER, f) for f in images]
+    return {'args': ctx['compress_args'], 'files': stat_fingerprint(paths)}
+
+def run_compress(ctx):
+    compress_photos.main(['-j', str(ctx['jobs'])] + ctx['compress_args'], ctx['listing'])
+
+def css_inputs(ctx):
+    return stat_fingerprint([generate_style_css.__file__])
+
+def run_css(ctx):
+    generate_style_css.main()
+
+def html_inputs(ctx):
+    # 與 generate_html --watch 的監看範圍相同 (不含 {date}_template.txt 草稿)
+    snapshot = {path: list(value) for path, value in generate_html.snapshot_watched_files().items()
+                if not path.endswith('_template.txt')}
+    snapshot.update(stat_fingerprint([generate_html.__file__]))
+    return {'args': ctx['html_args'], 'files': snapshot}
+
+def run_html(ctx):
+    generate_html.main(['-j', str(ctx['jobs'])] + ctx['html_args'])
+
+STAGES = [
+    # files 每次都執行: 它本身以資料夾的修改時間快取，而且要提供共用的檔名清單
+    {'name': 'files', 'deps': [], 'inputs': None, 'outputs': [generate_files_txt.OUTPUT_FILE],
+     'run': run_files, 'always': True},
+    # 媒體目錄是選用的 (執行過 media_catalog.py 才有)；有目錄時每次增量更新，沒有就略過
+    {'name': 'catalog', 'deps': ['files'], 'inputs': None, 'outputs': [],
+     'run': run_catalog, 'always': True, 'only_if_exists': [media_catalog.CATALOG_FILE]},
+    {'name': 'templates', 'deps': ['files', 'catalog'], 'inputs': templates_inputs, 'outputs': [],
+     'run': run_templates},
+    # youtube_id.txt 中已貼上的網址會被草稿覆蓋，所以只在檔案不存在時執行
+    {'name': 'youtube', 'deps': ['files'], 'inputs': None, 'outputs': [generate_youtube_id_txt.YOUTUBE_ID_FILENAME],
+     'run': run_youtube, 'only_if_missing': True},
+    {'name': 'compress', 'deps': ['files', 'catalog'], 'inputs': compress_inputs, 'outputs': [compress_photos.COMPRESS_MANIFEST_FILE],
+     'run': run_compress},
+    {'name': 'css', 'deps': [], 'inputs': css_inputs, 'outputs': [generate_style_css.CSS_FILE],
+     'run': run_css},
+    {'name': 'html', 'deps': ['youtube', 'compress', 'css'], 'inputs': html_inputs, 'outputs': ['index.html'],
+     'run': run_html},
+]
+
+def needs_run(stage, ctx, state, force):
+    """ 回傳 (是否執行, 這次的輸入指紋, 原因) """
+    if not all(os.path.exists(path) for path in stage.get('only_if_exists', [])):
+        return False, None, f"沒有 {', '.join(stage['only_if_exists'])}"
+    missing = [path for path in stage['outputs'] if not os.path.exists(path)]
+    if stage.get('only_if_missing'):
+        return bool(missing), None, "輸出不存在" if missing else "輸出已存在"
+    if stage.get('always'):
+        return True, None, "每次執行"
+    inputs = stage['inputs'](ctx)
+    if force:
+        return True, inputs, "強制執行"
+    if missing:
+        return True, inputs, f"缺少 {', '.join(missing)}"
+    if state.get(stage['name']) != inputs:
+        return True, inputs, "輸入有變更"
+    return False, inputs, "輸入未變更"
+
+def run_stage(stage, ctx, state, force, output):
+    """ 在執行緒中執行一個步驟；回傳 (狀態, 輸入指紋, 原因, 輸出內容, 秒數) """
+    output.local.buffer = io.StringIO()
+    t0 = time.perf_counter()
+    try:
+        run, inputs, reason = needs_run(stage, ctx, state, force)
+        if not run:
+            return 'skipped', inputs, reason, '', 0.0
+        stage['run'](ctx)
+        return 'done', inputs, reason, output.local.buffer.getvalue(), time.perf_counter() - t0
+    except BaseException as e:
+        log = output.local.buffer.getvalue() + f"錯誤: {type(e).__name__}: {e}\n"
+        return 'failed', None, "執行失敗", log, time.perf_counter() - t0
+    finally:
+        output.local.buffer = None
+
+def main():
+    """
+    一次執行整個流程: 掃描 media/ -> 更新媒體目錄 (有建立時) -> (日期草稿、YouTube 草稿、壓縮照片) 與樣式表 -> 網頁
+    只執行輸入有變更的步驟，互不依賴的步驟同時執行 (例如壓縮照片與生成樣式表)
+    """
+    parser = argparse.ArgumentParser(description="執行整個建置流程 (只重跑輸入有變更的步驟)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="壓縮照片與生成內頁時的平行程序數 (預設 1；0 = 依 CPU 核心數)")
+    parser.add_argument('--force', action='store_true', help="忽略上次的紀錄，執行所有步驟")
+    parser.add_argument('--formats', default='', help="傳給 compress_photos 的 --formats，例如 webp,avif")
+    parser.add_argument('--youtube-facade', action='store_true', help="傳給 generate_html 的 --youtube-facade")
+    parser.add_argument('--chunk-size', type=int, default=0, help="傳給 generate_html 的 --chunk-size (分段載入)")
+    args = parser.parse_args()
+
+    if not os.path.exists(generate_files_txt.MEDIA_FOLDER):
+        print(f"錯誤：找不到 '{generate_files_txt.MEDIA_FOLDER}' 資料夾。")
+        return
+
+    # 步驟在執行緒中執行，其中又會開子程序: 不以 fork 啟動，避免複製到其他執行緒持有的鎖
+    methods = multiprocessing.get_all_start_methods()
+    multiprocessing.set_start_method('forkserver' if 'forkserver' in methods else 'spawn')
+
+    ctx = {
+        'listing': [],
+        'jobs': args.jobs,
+        # 會影響輸出的參數 (計入輸入指紋)；平行程序數不影響輸出，不計入
+        'compress_args': ['--formats', args.formats],
+        'html_args': (['--youtube-facade'] if args.youtube_facade else []) + ['--chunk-size', str(args.chunk_size)],
+    }
+    state = load_state()
+    new_state = {}
+    results = {}
+    output = StageOutput(sys.stdout)
+    sys.stdout = output
+
+    print("--- 開始執行建置流程 ---")
+    t0 = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=len(STAGES)) as pool:
+            running = {}
+            while len(results) < len(STAGES):
+                for stage in STAGES:
+                    name = stage['name']
+                    if name in results or name in running.values():
+                        continue
+                    dep_status = [results.get(dep) for dep in stage['deps']]
+                    if any(status in ('failed', 'blocked') for status in dep_status):
+                        results[name] = 'blocked'
+                        print(f"[{name}] 未執行: 前置步驟失敗")
+                    elif all(status is not None for status in dep_status):
+                        running[pool.submit(run_stage, stage, ctx, state, args.force, output)] = name
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    status, inputs, reason, log, elapsed = future.result()
+                    results[name] = status
+                    if status == 'skipped':
+                        print(f"[{name}] 略過: {reason}")
+                        if name in state:
+                            new_state[name] = state[name]
+                        continue
+                    print(f"\n=== [{name}] {reason} ({elapsed:.1f} 秒) ===")
+                    print(log, end='')
+                    if status == 'done' and inputs is not None:
+                        new_state[name] = inputs
+    finally:
+        sys.stdout = output.stream
+        save_state(new_state)
+
+    counts = {status: sum(1 for s in results.values() if s == status) for status in ('done', 'skipped', 'failed', 'blocked')}
+    print(f"\n--- 流程結束 ({time.perf_counter() - t0:.1f} 秒): 執行 {counts['done']} 個、略過 {counts['skipped']} 個、"
+          f"失敗 {counts['failed']} 個、未執行 {counts['blocked']} 個 ---")
+    if counts['failed'] or counts['blocked']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()